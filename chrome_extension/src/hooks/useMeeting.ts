@@ -83,6 +83,10 @@ export function useMeeting(callbacks: UseMeetingCallbacks) {
             onNewSuggestedQuestion?.(question);
             break;
 
+          case "NEW_SUGGESTED_QUESTION_DELTA":
+            // Partial text only; the complete question arrives as NEW_SUGGESTED_QUESTION
+            break;
+
           case "STARTING_QUESTIONS":
             console.log("🔍 Starting questions:", validatedEvent.payload);
             // Handle payload: it might be a JSON string or an object
@@ -111,6 +115,10 @@ export function useMeeting(callbacks: UseMeetingCallbacks) {
             }
             break;
 
+          case "STARTING_QUESTION":
+            // Single question; the complete list arrives as STARTING_QUESTIONS
+            break;
+
           case "GREEN_FLAG":
             onGreenFlag?.(validatedEvent.payload.message);
             break;
@@ -257,6 +265,9 @@ export function useMeeting(callbacks: UseMeetingCallbacks) {
               : validatedEvent.payload.question;
             onNewSuggestedQuestion?.(question);
             break;
+          case "NEW_SUGGESTED_QUESTION_DELTA":
+            // Partial text only; the complete question arrives as NEW_SUGGESTED_QUESTION
+            break;
           case "STARTING_QUESTIONS":
             console.log("🔍 Starting questions:", validatedEvent.payload);
             // Handle payload: it might be a JSON string or an object
@@ -284,6 +295,9 @@ export function useMeeting(callbacks: UseMeetingCallbacks) {
               console.warn("⚠️ No valid questions found in STARTING_QUESTIONS payload");
             }
             break;
+          case "STARTING_QUESTION":
+            // Single question; the complete list arrives as STARTING_QUESTIONS
+            break;
           case "GREEN_FLAG":
             onGreenFlag?.(validatedEvent.payload.message);
             break;
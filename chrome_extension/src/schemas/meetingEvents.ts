@@ -38,6 +38,12 @@ export const newSuggestedQuestionSchema = z.union([
   }),
 ]);
 
+// Streamed chunk of the next suggested question; the full text follows as NEW_SUGGESTED_QUESTION
+export const newSuggestedQuestionDeltaSchema = z.object({
+  event: z.literal("NEW_SUGGESTED_QUESTION_DELTA"),
+  payload: z.string(),
+});
+
 export const startingQuestionSchema = z.union([
   z.object({
     event: z.literal("STARTING_QUESTIONS"),
@@ -51,6 +57,15 @@ export const startingQuestionSchema = z.union([
   }),
 ]);
 
+// One opening question as soon as it is generated; the full set follows as STARTING_QUESTIONS
+export const startingQuestionItemSchema = z.object({
+  event: z.literal("STARTING_QUESTION"),
+  payload: z.object({
+    index: z.number(),
+    question: z.string(),
+  }),
+});
+
 export const greenFlagSchema = z.object({
   type: z.literal("event"),
   event: z.literal("GREEN_FLAG"),
@@ -119,7 +134,9 @@ export const pdfGeneratedSchema = z.object({
 // Use union instead of discriminatedUnion to support flexible formats
 export const meetingEventSchema = z.union([
   newSuggestedQuestionSchema,
+  newSuggestedQuestionDeltaSchema,
   startingQuestionSchema,
+  startingQuestionItemSchema,
   greenFlagSchema,
   redFlagSchema,
   defineTermSchema,
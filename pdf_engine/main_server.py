@@ -3,15 +3,19 @@
 FastAPI service for generating interview scorecard PDFs from transcripts.
 Provides WebSocket endpoint for real-time generation and HTTP endpoint for downloads.
 """
+import asyncio
 import os
+import stat
 import logging
 import base64
 import json
+from contextlib import asynccontextmanager
 from datetime import datetime
 from dotenv import load_dotenv
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from playwright.async_api import async_playwright
 from scorecard_api import generate_scorecard
 
 # Load environment variables
@@ -25,25 +29,58 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Launch one shared Chromium instance for the lifetime of the service"""
+    app.state.playwright = await async_playwright().start()
+    app.state.browser = await app.state.playwright.chromium.launch()
+    logger.info("Chromium browser launched")
+    try:
+        yield
+    finally:
+        await app.state.browser.close()
+        await app.state.playwright.stop()
+        logger.info("Chromium browser closed")
+
+# Serializes relaunches, so concurrent requests that find Chromium dead start only one
+_browser_relaunch_lock = asyncio.Lock()
+
+async def get_browser(app: FastAPI):
+    """Return the shared Chromium instance, relaunching it if it crashed or was killed"""
+    if app.state.browser.is_connected():
+        return app.state.browser
+    async with _browser_relaunch_lock:
+        if not app.state.browser.is_connected():
+            logger.warning("Chromium browser disconnected; relaunching")
+            app.state.browser = await app.state.playwright.chromium.launch()
+    return app.state.browser
+
 app = FastAPI(
     title="PDF Engine Service",
     description="Generate interview scorecard PDFs from transcripts",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
-# Add CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # Configure appropriately for production
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+# Add CORS middleware only for explicitly configured frontend origins (comma-separated).
+# The WebSocket and plain /download links don't need CORS, so by default the layer is skipped.
+ALLOWED_ORIGINS = [origin.strip() for origin in os.getenv("ALLOWED_ORIGIN", "").split(",") if origin.strip()]
+if ALLOWED_ORIGINS:
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=ALLOWED_ORIGINS,
+        allow_credentials=True,
+        allow_methods=["GET"],
+    )
 
 # Output directories
 PDF_OUTPUT_DIR = "generated_pdfs"
 HTML_OUTPUT_DIR = "outputs"
 
+# Largest transcript accepted over the WebSocket, in characters
+MAX_TRANSCRIPT_CHARS = int(os.getenv("MAX_TRANSCRIPT_CHARS", "200000"))
+
 # Create directories if they don't exist
 os.makedirs(PDF_OUTPUT_DIR, exist_ok=True)
 os.makedirs(HTML_OUTPUT_DIR, exist_ok=True)
@@ -57,7 +94,7 @@ async def health_check():
     return {
         "status": "healthy",
         "service": "pdf-engine",
-        "timestamp": datetime.now().isoformat()
+        "timestamp": datetime.now()  # serialized natively by orjson
     }
 
 # -----------------
@@ -75,8 +112,22 @@ async def websocket_endpoint(websocket: WebSocket):
     logger.info("WebSocket connection accepted")
     
     try:
+        # Receive the raw frame so its size is checked before any decoding
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(message.get("code", 1000))
+        payload = message.get("text")
+        if payload is None:
+            payload = message.get("bytes") or b""
+        
+        if len(payload) > MAX_TRANSCRIPT_CHARS:
+            await websocket.send_text("ERROR|Transcript too large")
+            logger.error(f"Transcript too large ({len(payload)} chars)")
+            await websocket.close(code=1009)  # Message too big
+            return
+        
         # Receive transcript content
-        transcript_content = await websocket.receive_text()
+        transcript_content = payload if isinstance(payload, str) else payload.decode('utf-8', errors='replace')
         logger.info(f"Received transcript ({len(transcript_content)} chars)")
         
         await websocket.send_text("Status: Transcript received. Starting generation...")
@@ -95,7 +146,8 @@ async def websocket_endpoint(websocket: WebSocket):
             transcript_text=transcript_content,
             output_dir=HTML_OUTPUT_DIR,
             save_files=True,
-            include_pdf_link_in_html=False
+            include_pdf_link_in_html=False,
+            browser=await get_browser(websocket.app)
         )
 
         if not result['success']:
@@ -106,12 +158,17 @@ async def websocket_endpoint(websocket: WebSocket):
         
         await websocket.send_text("Status: PDF generated. Sending PDF...")
         
+        # Take ownership of the PDF bytes so they can be freed once encoded
+        pdf_bytes = result.pop('pdf_bytes')
+        
         # Send PDF as JSON with base64 encoded bytes
-        if result['pdf_bytes']:
+        if pdf_bytes:
             filename = f"report_{result['timestamp']}.pdf"
+            pdf_size = len(pdf_bytes)
             
             # Encode PDF bytes to base64
-            pdf_base64 = base64.b64encode(result['pdf_bytes']).decode('utf-8')
+            pdf_base64 = base64.b64encode(pdf_bytes).decode('utf-8')
+            del pdf_bytes
             
             # Create JSON event matching the schema
             pdf_event = {
@@ -125,7 +182,7 @@ async def websocket_endpoint(websocket: WebSocket):
             
             # Send JSON event
             await websocket.send_text(json.dumps(pdf_event))
-            logger.info(f"PDF event sent ({len(result['pdf_bytes'])} bytes, base64: {len(pdf_base64)} chars)")
+            logger.info(f"PDF event sent ({pdf_size} bytes, base64: {len(pdf_base64)} chars)")
         else:
             error_msg = "ERROR|PDF generation failed - no PDF bytes returned"
             await websocket.send_text(error_msg)
@@ -155,14 +212,19 @@ async def download_file(filename: str):
     Returns:
         FileResponse with the PDF file
     """
-    # Security: Prevent directory traversal
-    if ".." in filename or "/" in filename or "\\" in filename:
+    # Security: Prevent directory traversal (".." needs a separator or a leading dot)
+    if "/" in filename or "\\" in filename or filename.startswith("."):
         logger.warning(f"Invalid filename requested: {filename}")
         raise HTTPException(status_code=400, detail="Invalid filename")
     
     file_path = os.path.join(PDF_OUTPUT_DIR, filename)
     
-    if not os.path.exists(file_path):
+    # Single stat, handed to FileResponse so it doesn't stat the file again
+    try:
+        stat_result = os.stat(file_path)
+    except (OSError, ValueError):  # ValueError: embedded NUL byte in the name
+        stat_result = None
+    if stat_result is None or not stat.S_ISREG(stat_result.st_mode):
         logger.warning(f"File not found: {file_path}")
         raise HTTPException(status_code=404, detail="File not found")
     
@@ -170,7 +232,8 @@ async def download_file(filename: str):
     return FileResponse(
         file_path,
         media_type='application/pdf',
-        filename=filename
+        filename=filename,
+        stat_result=stat_result
     )
 
 # -----------------
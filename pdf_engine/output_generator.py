@@ -1,167 +1,97 @@
 """
 Module for generating structured output files in various formats
 """
-import json
 import csv
+import io
+import json
 import os
+import threading
+from dataclasses import dataclass
 from datetime import datetime
 from typing import Dict, Any, List
 
-def create_structured_output(score_data: Dict[str, Any], output_dir: str = "outputs") -> Dict[str, str]:
-    """
-    Create structured output files in multiple formats (JSON, CSV, Markdown)
-    
-    Args:
-        score_data: Dictionary containing score information
-        output_dir: Directory to save output files
-        
-    Returns:
-        Dictionary with paths to created files
-    """
-    # Create output directory if it doesn't exist
-    os.makedirs(output_dir, exist_ok=True)
-    
-    # Generate timestamp for unique filenames
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    
-    output_files = {}
-    
-    # Generate JSON output
-    json_path = os.path.join(output_dir, f"scorecard_{timestamp}.json")
-    with open(json_path, 'w', encoding='utf-8') as f:
-        json.dump(score_data, f, indent=2, ensure_ascii=False)
-    output_files['json'] = json_path
-    
-    # Generate CSV output (for table data)
-    csv_path = os.path.join(output_dir, f"scorecard_{timestamp}.csv")
-    create_csv_output(score_data, csv_path)
-    output_files['csv'] = csv_path
-    
-    # Generate Markdown output (human-readable)
-    md_path = os.path.join(output_dir, f"scorecard_{timestamp}.md")
-    create_markdown_output(score_data, md_path)
-    output_files['markdown'] = md_path
-    
-    return output_files
+import orjson
 
-def create_csv_output(score_data: Dict[str, Any], csv_path: str):
-    """
-    Create CSV file with score data in table format
-    """
-    with open(csv_path, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        
-        # Write header
-        writer.writerow(['Category', 'Score', 'Max Score', 'Percentage', 'Details'])
-        
-        # Write overall grade row
-        writer.writerow(['Overall Grade', score_data.get('overall_grade', 'N/A'), '', '', ''])
-        
-        # Write category rows
-        categories = score_data.get('categories', [])
-        for category in categories:
-            score = category.get('score', 0)
-            max_score = category.get('max_score', 0)
-            percentage = (score / max_score * 100) if max_score > 0 else 0
-            writer.writerow([
-                category.get('name', 'Unknown'),
-                score,
-                max_score,
-                f"{percentage:.1f}%",
-                category.get('details', '')
-            ])
-        
-        # Write metadata rows
-        writer.writerow([])
-        writer.writerow(['Metadata', 'Value', '', '', ''])
-        writer.writerow(['Total Questions', score_data.get('total_questions', 0), '', '', ''])
-        writer.writerow(['Word Count', score_data.get('word_count', 0), '', '', ''])
-        writer.writerow(['Transcript Length', score_data.get('transcript_length', 0), '', '', ''])
+# Display format of the "Generated" time in the Markdown and HTML reports
+GENERATED_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Grade color by minimum percentage, highest first; anything lower is red
+GRADE_COLORS = (
+    (85, '#28a745'),  # Green
+    (70, '#17a2b8'),  # Blue
+    (55, '#ffc107'),  # Yellow
+    (40, '#fd7e14'),  # Orange
+)
+
+# Placeholders for missing feedback arguments
+_PENDING_FEEDBACK = ("Feedback generation pending", "Feedback generation pending")
+
+# Output directories already created by this process, so repeat calls skip mkdir
+_ensured_dirs = set()
+_ensured_dirs_lock = threading.Lock()
+
+# Scorecard files are small, so one buffer holds a whole payload
+WRITE_BUFFER_SIZE = 128 * 1024
 
-def create_markdown_output(score_data: Dict[str, Any], md_path: str):
+LEVEL_COLORS = {
+    'Poor': '#dc3545',
+    'Basic': '#ffc107',
+    'Advanced': '#28a745'
+}
+
+@dataclass(slots=True)
+class CategoryRow:
+    """Display fields of one scored category, computed once and shared by every output format"""
+    name: str
+    score: int
+    max_score: int
+    percentage: str
+    details: str
+    level: str
+    level_color: str
+
+def _format_percentage(score, max_score) -> str:
     """
-    Create Markdown file with formatted score report
+    score/max_score as a one-decimal percentage; integer marks skip float formatting
     """
-    with open(md_path, 'w', encoding='utf-8') as f:
-        f.write("# Interview Scorecard Report\n\n")
-        f.write(f"**Generated:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-        
-        # Overall Grade
-        f.write("## Overall Grade\n\n")
-        f.write(f"### {score_data.get('overall_grade', 'N/A')}\n\n")
-        
-        # Summary Table
-        f.write("## Summary\n\n")
-        f.write("| Metric | Value |\n")
-        f.write("|--------|-------|\n")
-        f.write(f"| Total Questions | {score_data.get('total_questions', 0)} |\n")
-        f.write(f"| Word Count | {score_data.get('word_count', 0)} |\n")
-        f.write(f"| Transcript Length | {score_data.get('transcript_length', 0)} characters |\n\n")
-        
-        # Categories Table
-        f.write("## Category Scores\n\n")
-        f.write("| Category | Score | Max Score | Percentage | Details |\n")
-        f.write("|----------|-------|-----------|------------|----------|\n")
-        
-        categories = score_data.get('categories', [])
-        for category in categories:
-            score = category.get('score', 0)
-            max_score = category.get('max_score', 0)
-            percentage = (score / max_score * 100) if max_score > 0 else 0
-            f.write(f"| {category.get('name', 'Unknown')} | {score} | {max_score} | {percentage:.1f}% | {category.get('details', '')} |\n")
-        
-        f.write("\n")
-        
-        # Detailed Scores (if available)
-        detailed_scores = score_data.get('detailed_scores', {})
-        if detailed_scores:
-            f.write("## Detailed Scores\n\n")
-            f.write("```json\n")
-            f.write(json.dumps(detailed_scores, indent=2))
-            f.write("\n```\n\n")
+    if max_score <= 0:
+        return "0.0%"
+    if type(score) is int and type(max_score) is int and score >= 0:
+        tenths, remainder = divmod(score * 1000, max_score)
+        # Round half to even, like float formatting does for these exact ties
+        if 2 * remainder > max_score or (2 * remainder == max_score and tenths % 2):
+            tenths += 1
+        return f"{tenths // 10}.{tenths % 10}%"
+    return f"{score / max_score * 100:.1f}%"
 
-def create_html_output(score_data: Dict[str, Any]) -> str:
+def normalize_categories(categories: List[Dict[str, Any]], default_max_score: int = 0) -> List[CategoryRow]:
     """
-    Create HTML output for display in Gradio
-    
-    Args:
-        score_data: Dictionary containing score information
-        
-    Returns:
-        HTML string with formatted scorecard
+    Resolve defaults, percentage and level color for each category in a single pass
     """
-    final_grade = score_data.get('overall_grade', 'N/A')  # Now contains "X/20" format
-    total_score = score_data.get('total_score', 0)
-    max_score = score_data.get('max_score', 20)
-    percentage = score_data.get('percentage', 0)
-    word_count = score_data.get('word_count', 0)
-    transcript_length = score_data.get('transcript_length', 0)
-    categories = score_data.get('categories', [])
-    scores = score_data.get('scores', [])
-    feedback = score_data.get('feedback', {
-        "positive": ["Feedback generation pending", "Feedback generation pending"],
-        "negative": ["Feedback generation pending", "Feedback generation pending"]
-    })
-    
-    # Determine grade color based on percentage
-    if percentage >= 85:
-        grade_color = '#28a745'  # Green
-    elif percentage >= 70:
-        grade_color = '#17a2b8'  # Blue
-    elif percentage >= 55:
-        grade_color = '#ffc107'  # Yellow
-    elif percentage >= 40:
-        grade_color = '#fd7e14'  # Orange
-    else:
-        grade_color = '#dc3545'  # Red
-    
-    html = f"""
+    rows = []
+    for category in categories:
+        score = category.get('score', 0)
+        max_score = category.get('max_score', default_max_score)
+        level = category.get('level', 'Poor')
+        rows.append(CategoryRow(
+            name=category.get('name', 'Unknown'),
+            score=score,
+            max_score=max_score,
+            percentage=_format_percentage(score, max_score),
+            details=category.get('details', ''),
+            level=level,
+            level_color=LEVEL_COLORS.get(level, '#6c757d'),
+        ))
+    return rows
+
+# Static page head and CSS, emitted verbatim; the grade color rule is appended per call
+_HTML_HEAD_PRE = """
     <!DOCTYPE html>
     <html>
     <head>
         <meta charset="UTF-8">
         <style>
-            body {{
+            body {
                 font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, sans-serif;
                 line-height: 1.6;
                 color: #333;
@@ -169,101 +99,100 @@ def create_html_output(score_data: Dict[str, Any]) -> str:
                 margin: 0 auto;
                 padding: 20px;
                 background-color: #f8f9fa;
-            }}
-            .header {{
+            }
+            .header {
                 background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
                 color: white;
                 padding: 30px;
                 border-radius: 10px;
                 margin-bottom: 30px;
                 box-shadow: 0 4px 6px rgba(0,0,0,0.1);
-            }}
-            .header h1 {{
+            }
+            .header h1 {
                 margin: 0;
                 font-size: 2.5em;
-            }}
-            .header .timestamp {{
+            }
+            .header .timestamp {
                 margin-top: 10px;
                 opacity: 0.9;
                 font-size: 0.9em;
-            }}
-            .grade-display {{
+            }
+            .grade-display {
                 text-align: center;
                 background: white;
                 padding: 40px;
                 border-radius: 10px;
                 margin-bottom: 30px;
                 box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-            }}
-            .grade-display .grade {{
+            }
+            .grade-display .grade {
                 font-size: 5em;
                 font-weight: bold;
-                color: {grade_color};
                 margin: 10px 0;
-            }}
-            .section {{
+            }
+            .section {
                 background: white;
                 padding: 25px;
                 border-radius: 10px;
                 margin-bottom: 20px;
                 box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-            }}
-            .section h2 {{
+            }
+            .section h2 {
                 color: #667eea;
                 border-bottom: 3px solid #667eea;
                 padding-bottom: 10px;
                 margin-top: 0;
-            }}
-            table {{
+            }
+            table {
                 width: 100%;
                 border-collapse: collapse;
                 margin-top: 15px;
-            }}
-            th {{
+            }
+            th {
                 background-color: #667eea;
                 color: white;
                 padding: 12px;
                 text-align: left;
                 font-weight: 600;
-            }}
-            td {{
+            }
+            td {
                 padding: 12px;
                 border-bottom: 1px solid #e0e0e0;
-            }}
-            tr:hover {{
+            }
+            tr:hover {
                 background-color: #f5f5f5;
-            }}
-            .metric-grid {{
+            }
+            .metric-grid {
                 display: grid;
                 grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
                 gap: 15px;
                 margin-top: 15px;
-            }}
-            .metric-card {{
+            }
+            .metric-card {
                 background: linear-gradient(135deg, #f5f7fa 0%, #c3cfe2 100%);
                 padding: 20px;
                 border-radius: 8px;
                 text-align: center;
-            }}
-            .metric-card .value {{
+            }
+            .metric-card .value {
                 font-size: 2em;
                 font-weight: bold;
                 color: #667eea;
-            }}
-            .metric-card .label {{
+            }
+            .metric-card .label {
                 color: #666;
                 margin-top: 5px;
                 font-size: 0.9em;
-            }}
-            .progress-bar {{
+            }
+            .progress-bar {
                 width: 100%;
                 height: 25px;
                 background-color: #e0e0e0;
                 border-radius: 12px;
                 overflow: hidden;
                 margin-top: 5px;
-            }}
-            .progress-fill {{
+            }
+            .progress-fill {
                 height: 100%;
                 background: linear-gradient(90deg, #667eea 0%, #764ba2 100%);
                 transition: width 0.3s ease;
@@ -273,20 +202,29 @@ def create_html_output(score_data: Dict[str, Any]) -> str:
                 color: white;
                 font-weight: bold;
                 font-size: 0.85em;
-            }}
-            .details-section {{
+            }
+            .details-section {
                 background-color: #f8f9fa;
                 padding: 15px;
                 border-radius: 5px;
                 margin-top: 10px;
                 border-left: 4px solid #667eea;
-            }}
-        </style>
+            }
+            @media print {
+                .no-print {
+                    display: none;
+                }
+            }
+"""
+
+# Rest of the scaffolding, filled in with str.format
+_HTML_HEAD_POST = """        </style>
     </head>
     <body>
+        {prefix_html}
         <div class="header">
             <h1>🎯 Interview Scorecard Report</h1>
-            <div class="timestamp">Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</div>
+            <div class="timestamp">Generated: {generated}</div>
         </div>
         
         <div class="grade-display">
@@ -294,67 +232,11 @@ def create_html_output(score_data: Dict[str, Any]) -> str:
             <div class="grade">{final_grade}</div>
         </div>
         
+"""
+
+_CATEGORY_TABLE_OPEN = """
         <div class="section">
-            <h2>📋 Role-based Skills</h2>
-            <table>
-                <thead>
-                    <tr>
-                        <th>Criterion</th>
-                        <th>Level</th>
-                        <th>Mark</th>
-                        <th>Max</th>
-                    </tr>
-                </thead>
-                <tbody>
-    """
-    
-    # Level colors
-    level_colors = {
-        'Poor': '#dc3545',
-        'Basic': '#ffc107',
-        'Advanced': '#28a745'
-    }
-    
-    # Separate role-based (first 3) and cultural fit (last 4)
-    role_based_criteria = categories[:3]
-    cultural_fit_criteria = categories[3:]
-    
-    # Add role-based category rows
-    for category in role_based_criteria:
-        name = category.get('name', 'Unknown')
-        score = category.get('score', 0)
-        max_score = category.get('max_score', 4)  # Should be 4 for role-based
-        level = category.get('level', 'Poor')
-        justification = category.get('details', '')
-        level_color = level_colors.get(level, '#6c757d')
-        
-        html += f"""
-                    <tr>
-                        <td><strong>{name}</strong></td>
-                        <td><span style="color: {level_color}; font-weight: bold;">{level}</span></td>
-                        <td><strong>{score}</strong></td>
-                        <td>{max_score}</td>
-                    </tr>
-        """
-        
-        if justification and justification != "Analysis pending - LLM integration required.":
-            html += f"""
-                    <tr>
-                        <td colspan="4">
-                            <div class="details-section">
-                                <strong>Justification:</strong> {justification}
-                            </div>
-                        </td>
-                    </tr>
-            """
-    
-    html += """
-                </tbody>
-            </table>
-        </div>
-        
-        <div class="section">
-            <h2>📋 Cultural Fit</h2>
+            <h2>📋 {title}</h2>
             <table>
                 <thead>
                     <tr>
@@ -366,53 +248,36 @@ def create_html_output(score_data: Dict[str, Any]) -> str:
                 </thead>
                 <tbody>
     """
-    
-    # Add cultural fit category rows
-    for category in cultural_fit_criteria:
-        name = category.get('name', 'Unknown')
-        score = category.get('score', 0)
-        max_score = category.get('max_score', 2)
-        level = category.get('level', 'Poor')
-        justification = category.get('details', '')
-        level_color = level_colors.get(level, '#6c757d')
-        
-        html += f"""
+
+# Per-category rows, formatted with a CategoryRow as `row`
+_CATEGORY_ROW = """
                     <tr>
-                        <td><strong>{name}</strong></td>
-                        <td><span style="color: {level_color}; font-weight: bold;">{level}</span></td>
-                        <td><strong>{score}</strong></td>
-                        <td>{max_score}</td>
+                        <td><strong>{row.name}</strong></td>
+                        <td><span style="color: {row.level_color}; font-weight: bold;">{row.level}</span></td>
+                        <td><strong>{row.score}</strong></td>
+                        <td>{row.max_score}</td>
                     </tr>
         """
-        
-        if justification and justification != "Analysis pending - LLM integration required.":
-            html += f"""
+
+_JUSTIFICATION_ROW = """
                     <tr>
                         <td colspan="4">
                             <div class="details-section">
-                                <strong>Justification:</strong> {justification}
+                                <strong>Justification:</strong> {row.details}
                             </div>
                         </td>
                     </tr>
             """
-    
-    html += """
+
+_MARKDOWN_CATEGORY_ROW = "| {row.name} | {row.score} | {row.max_score} | {row.percentage} | {row.details} |\n"
+
+_CATEGORY_TABLE_CLOSE = """
                 </tbody>
             </table>
         </div>
     """
-    
-    # Add feedback section
-    positive_args = feedback.get("positive", ["Feedback generation pending", "Feedback generation pending"])
-    negative_args = feedback.get("negative", ["Feedback generation pending", "Feedback generation pending"])
-    
-    # Ensure we have at least 2 of each
-    while len(positive_args) < 2:
-        positive_args.append("Feedback generation pending")
-    while len(negative_args) < 2:
-        negative_args.append("Feedback generation pending")
-    
-    html += f"""
+
+_FEEDBACK_SECTION = """
         <div class="section">
             <h2>💬 Suggested Feedback</h2>
             <div style="background-color: #ffffff; padding: 30px; border-radius: 8px; border: 1px solid #e0e0e0; line-height: 1.8;">
@@ -423,11 +288,11 @@ def create_html_output(score_data: Dict[str, Any]) -> str:
                 <ul style="list-style: none; padding-left: 0;">
                     <li style="margin: 10px 0; padding-left: 25px; position: relative;">
                         <span style="position: absolute; left: 0;">(+)</span>
-                        {positive_args[0]}
+                        {positive[0]}
                     </li>
                     <li style="margin: 10px 0; padding-left: 25px; position: relative;">
                         <span style="position: absolute; left: 0;">(+)</span>
-                        {positive_args[1]}
+                        {positive[1]}
                     </li>
                 </ul>
                 
@@ -436,11 +301,11 @@ def create_html_output(score_data: Dict[str, Any]) -> str:
                 <ul style="list-style: none; padding-left: 0;">
                     <li style="margin: 10px 0; padding-left: 25px; position: relative;">
                         <span style="position: absolute; left: 0;">(-)</span>
-                        {negative_args[0]}
+                        {negative[0]}
                     </li>
                     <li style="margin: 10px 0; padding-left: 25px; position: relative;">
                         <span style="position: absolute; left: 0;">(-)</span>
-                        {negative_args[1]}
+                        {negative[1]}
                     </li>
                 </ul>
                 
@@ -450,20 +315,223 @@ def create_html_output(score_data: Dict[str, Any]) -> str:
             </div>
         </div>
     """
-    
-    # Add raw scores JSON section
-    if scores:
-        html += f"""
+
+_RAW_SCORES_SECTION = """
         <div class="section">
             <h2>🔍 Raw Scores Data (JSON)</h2>
-            <pre style="background-color: #f8f9fa; padding: 15px; border-radius: 5px; overflow-x: auto; font-size: 0.9em;">{json.dumps({"scores": scores}, indent=2, ensure_ascii=False)}</pre>
+            <pre style="background-color: #f8f9fa; padding: 15px; border-radius: 5px; overflow-x: auto; font-size: 0.9em;">{scores_json}</pre>
         </div>
         """
-    
-    html += """
+
+_HTML_TAIL = """
     </body>
     </html>
     """
+
+def create_structured_output(score_data: Dict[str, Any], output_dir: str = "outputs") -> Dict[str, str]:
+    """
+    Create structured output files in multiple formats (JSON, CSV, Markdown)
+    
+    Args:
+        score_data: Dictionary containing score information
+        output_dir: Directory to save output files
+        
+    Returns:
+        Dictionary with paths to created files
+    """
+    # Create output directory if it doesn't exist
+    ensure_dir(output_dir)
+    
+    # Generate timestamp for unique filenames, and the same instant for display
+    now = datetime.now()
+    timestamp = now.strftime("%Y%m%d_%H%M%S")
+    generated = now.strftime(GENERATED_FORMAT)
+    
+    rows = normalize_categories(score_data.get('categories', []))
+    
+    # Build every payload in memory first, then write each file with a single write()
+    payloads = {
+        'json': (f"scorecard_{timestamp}.json", orjson.dumps(score_data, option=orjson.OPT_INDENT_2)),  # Machine-readable
+        'csv': (f"scorecard_{timestamp}.csv", render_csv(score_data, rows).encode('utf-8')),  # Table data
+        'markdown': (f"scorecard_{timestamp}.md", render_markdown(score_data, rows, generated)),  # Human-readable
+    }
+    
+    output_files = {}
+    for kind, (filename, payload) in payloads.items():
+        path = os.path.join(output_dir, filename)
+        _write_bytes(path, payload)
+        output_files[kind] = path
+    
+    return output_files
+
+def ensure_dir(path: str):
+    """
+    Create path (and parents) once per process
+    """
+    if path in _ensured_dirs:
+        return
+    with _ensured_dirs_lock:
+        if path not in _ensured_dirs:
+            os.makedirs(path, exist_ok=True)
+            _ensured_dirs.add(path)
+
+def _write_bytes(path: str, payload: bytes):
+    with open(path, 'wb', buffering=WRITE_BUFFER_SIZE) as f:
+        f.write(payload)
+
+def create_csv_output(score_data: Dict[str, Any], csv_path: str, rows: List[CategoryRow] = None):
+    """
+    Create CSV file with score data in table format
+    """
+    _write_bytes(csv_path, render_csv(score_data, rows).encode('utf-8'))
+
+def render_csv(score_data: Dict[str, Any], rows: List[CategoryRow] = None) -> str:
+    """
+    Render the CSV score table as a string
+    """
+    if rows is None:
+        rows = normalize_categories(score_data.get('categories', []))
+    
+    # Header
+    lines = ["Category,Score,Max Score,Percentage,Details\r\n"]
+    
+    # Overall grade row
+    lines.append(_csv_row(['Overall Grade', score_data.get('overall_grade', 'N/A'), '', '', '']))
+    
+    # Category rows
+    for row in rows:
+        lines.append(_csv_row([row.name, row.score, row.max_score, row.percentage, row.details]))
+    
+    # Metadata rows
+    lines.append("\r\n")
+    lines.append("Metadata,Value,,,\r\n")
+    lines.append(_csv_row(['Total Questions', score_data.get('total_questions', 0), '', '', '']))
+    lines.append(_csv_row(['Word Count', score_data.get('word_count', 0), '', '', '']))
+    lines.append(_csv_row(['Transcript Length', score_data.get('transcript_length', 0), '', '', '']))
+    return "".join(lines)
+
+def _csv_row(fields: List[Any]) -> str:
+    """
+    Format one CSV record; only records with a delimiter, quote or newline go through csv quoting
+    """
+    values = ['' if field is None else str(field) for field in fields]
+    if any(char in value for value in values for char in ',"\r\n'):
+        with io.StringIO() as f:
+            csv.writer(f).writerow(values)
+            return f.getvalue()
+    return ",".join(values) + "\r\n"
+
+def create_markdown_output(score_data: Dict[str, Any], md_path: str, rows: List[CategoryRow] = None, generated: str = None):
+    """
+    Create Markdown file with formatted score report
+    """
+    _write_bytes(md_path, render_markdown(score_data, rows, generated))
+
+def render_markdown(score_data: Dict[str, Any], rows: List[CategoryRow] = None, generated: str = None) -> bytearray:
+    """
+    Render the Markdown score report as UTF-8 bytes, ready for a single binary write
+    """
+    if rows is None:
+        rows = normalize_categories(score_data.get('categories', []))
+    if generated is None:
+        generated = datetime.now().strftime(GENERATED_FORMAT)
+    
+    # Title, overall grade, summary table and the categories table header
+    buf = bytearray((
+        "# Interview Scorecard Report\n\n"
+        f"**Generated:** {generated}\n\n"
+        "## Overall Grade\n\n"
+        f"### {score_data.get('overall_grade', 'N/A')}\n\n"
+        "## Summary\n\n"
+        "| Metric | Value |\n"
+        "|--------|-------|\n"
+        f"| Total Questions | {score_data.get('total_questions', 0)} |\n"
+        f"| Word Count | {score_data.get('word_count', 0)} |\n"
+        f"| Transcript Length | {score_data.get('transcript_length', 0)} characters |\n\n"
+        "## Category Scores\n\n"
+        "| Category | Score | Max Score | Percentage | Details |\n"
+        "|----------|-------|-----------|------------|----------|\n"
+    ).encode('utf-8'))
+    
+    for row in rows:
+        buf += _MARKDOWN_CATEGORY_ROW.format(row=row).encode('utf-8')
+    
+    buf += b"\n"
+    
+    # Detailed Scores (if available); this block has always been ASCII-escaped, so it
+    # stays on json.dumps rather than orjson, which cannot escape non-ASCII
+    detailed_scores = score_data.get('detailed_scores', {})
+    if detailed_scores:
+        buf += b"## Detailed Scores\n\n```json\n"
+        buf += json.dumps(detailed_scores, indent=2).encode('ascii')
+        buf += b"\n```\n\n"
+    
+    return buf
+
+def _render_category_table(title: str, rows: List[CategoryRow]) -> str:
+    """
+    Render one category section: a row per criterion, plus its justification when there is one
+    """
+    parts = [_CATEGORY_TABLE_OPEN.format(title=title)]
+    for row in rows:
+        parts.append(_CATEGORY_ROW.format(row=row))
+        if row.details and row.details != "Analysis pending - LLM integration required.":
+            parts.append(_JUSTIFICATION_ROW.format(row=row))
+    parts.append(_CATEGORY_TABLE_CLOSE)
+    return "".join(parts)
+
+def create_html_output(score_data: Dict[str, Any], prefix_html: str = "", generated: str = None) -> str:
+    """
+    Create HTML output for display in Gradio
+    
+    Args:
+        score_data: Dictionary containing score information
+        prefix_html: Optional HTML placed at the top of the body (e.g. a PDF download banner)
+        generated: Display time of generation, defaults to now (pass it to keep rebuilds consistent)
+        
+    Returns:
+        HTML string with formatted scorecard
+    """
+    final_grade = score_data.get('overall_grade', 'N/A')  # Now contains "X/20" format
+    total_score = score_data.get('total_score', 0)
+    max_score = score_data.get('max_score', 20)
+    percentage = score_data.get('percentage', 0)
+    word_count = score_data.get('word_count', 0)
+    transcript_length = score_data.get('transcript_length', 0)
+    categories = score_data.get('categories', [])
+    scores = score_data.get('scores', [])
+    feedback = score_data.get('feedback') or {}
+    
+    # Determine grade color based on percentage
+    grade_color = next((color for threshold, color in GRADE_COLORS if percentage >= threshold), '#dc3545')
+    if generated is None:
+        generated = datetime.now().strftime(GENERATED_FORMAT)
+    
+    parts = [
+        _HTML_HEAD_PRE,
+        f"            .grade-display .grade {{ color: {grade_color}; }}\n",
+        _HTML_HEAD_POST.format(
+            prefix_html=prefix_html,
+            generated=generated,
+            final_grade=final_grade,
+        ),
+    ]
+    
+    # Separate role-based (first 3, max 4 each) and cultural fit (last 4, max 2 each)
+    parts.append(_render_category_table("Role-based Skills", normalize_categories(categories[:3], default_max_score=4)))
+    parts.append(_render_category_table("Cultural Fit", normalize_categories(categories[3:], default_max_score=2)))
+    
+    # Add feedback section, padded to 2 of each without touching score_data
+    positive_args = [*feedback.get("positive", ()), *_PENDING_FEEDBACK][:2]
+    negative_args = [*feedback.get("negative", ()), *_PENDING_FEEDBACK][:2]
+    
+    parts.append(_FEEDBACK_SECTION.format(positive=positive_args, negative=negative_args))
+    
+    # Add raw scores JSON section
+    if scores:
+        parts.append(_RAW_SCORES_SECTION.format(scores_json=orjson.dumps({"scores": scores}, option=orjson.OPT_INDENT_2).decode('utf-8')))
+    
+    parts.append(_HTML_TAIL)
     
-    return html
+    return "".join(parts)
 
@@ -53,18 +53,73 @@ async def create_scorecard(transcript: str):
 
 import os
 import base64
+import asyncio
+import logging
 from datetime import datetime
 from typing import Dict, Any, Optional
 from playwright.async_api import async_playwright
-from scoring_engine import generate_score
-from output_generator import create_html_output
+from scoring_engine import generate_score_async
+from output_generator import GENERATED_FORMAT, create_html_output, ensure_dir
+
+logger = logging.getLogger(__name__)
+
+# Bound concurrent PDF renders so simultaneous requests don't exhaust memory
+PDF_MAX_CONCURRENCY = int(os.getenv("PDF_MAX_CONCURRENCY", str(os.cpu_count() or 1)))
+_pdf_render_semaphore = asyncio.Semaphore(PDF_MAX_CONCURRENCY)
+
+
+def _write_html(path: str, text: str) -> None:
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+def _pdf_link_banner(pdf_href: str, timestamp: str) -> str:
+    """
+    Build the PDF download banner; hidden when printing so it stays out of the PDF itself.
+    """
+    return f"""
+            <div class="no-print" style="background-color: #e7f3ff; padding: 15px; border-radius: 8px; margin-bottom: 20px; border-left: 4px solid #667eea;">
+                <p style="margin: 0;"><strong>📄 PDF Available:</strong> 
+                <a href="{pdf_href}" download="scorecard_{timestamp}.pdf" style="color: #667eea; text-decoration: underline; font-weight: bold;">
+                    Download PDF Scorecard
+                </a>
+                </p>
+            </div>
+            """
+
+
+async def _render_pdf(browser, html_output: str, pdf_path: Optional[str]) -> bytes:
+    """
+    Render HTML to PDF in a fresh browser context, closed once the PDF is produced.
+    """
+    context = await browser.new_context()
+    try:
+        page = await context.new_page()
+        await page.set_content(html_output, wait_until='networkidle')
+        
+        # Generate PDF bytes; Playwright writes straight to pdf_path when given
+        return await page.pdf(
+            path=pdf_path,
+            format='A4',
+            print_background=True,
+            margin={
+                'top': '20mm',
+                'right': '15mm',
+                'bottom': '20mm',
+                'left': '15mm'
+            }
+        )
+    finally:
+        await context.close()
 
 
 async def generate_scorecard(
     transcript_text: str,
     output_dir: str = "outputs",
     save_files: bool = True,
-    include_pdf_link_in_html: bool = True
+    include_pdf_link_in_html: bool = True,
+    browser=None,
+    standalone: bool = True
 ) -> Dict[str, Any]:
     """
     Generate a complete interview scorecard with HTML and PDF outputs.
@@ -79,6 +134,14 @@ async def generate_scorecard(
         Whether to save HTML and PDF files to disk (default: True)
     include_pdf_link_in_html : bool, optional
         Whether to include a PDF download link in the HTML output (default: True)
+    browser : playwright Browser, optional
+        Already-launched Chromium instance to render with. When omitted, a
+        browser is launched for this call and closed afterwards.
+    standalone : bool, optional
+        Embed the PDF in the HTML link as a base64 data URL, so the saved HTML
+        works on its own (default: True). Pass False to link to
+        /download/scorecard_<timestamp>.pdf instead; only do so when output_dir
+        is the directory an HTTP server serves under /download
     
     Returns:
     --------
@@ -117,14 +180,22 @@ async def generate_scorecard(
         }
     
     try:
-        # Generate timestamp
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        # Generate timestamp, and the same instant for display in every HTML build
+        now = datetime.now()
+        timestamp = now.strftime("%Y%m%d_%H%M%S")
+        generated = now.strftime(GENERATED_FORMAT)
         
         # Step 1: Generate scores using LLM
-        score_data = generate_score(transcript_text)
+        score_data = await generate_score_async(transcript_text)
         
-        # Step 2: Create HTML output
-        html_output = create_html_output(score_data)
+        # Step 2: Create HTML output. The /download link is known up front, so
+        # it is built into the document once; the data URL needs the PDF first
+        link_in_html = include_pdf_link_in_html and save_files and not standalone
+        pdf_download_link = (
+            _pdf_link_banner(f"/download/scorecard_{timestamp}.pdf", timestamp)
+            if link_in_html else ""
+        )
+        html_output = create_html_output(score_data, prefix_html=pdf_download_link, generated=generated)
         
         # Initialize return values
         html_path = None
@@ -133,63 +204,44 @@ async def generate_scorecard(
         
         # Step 3: Save files if requested
         if save_files:
-            os.makedirs(output_dir, exist_ok=True)
+            ensure_dir(output_dir)  # Only the first call per directory touches the filesystem
             html_path = os.path.join(output_dir, f"scorecard_{timestamp}.html")
             pdf_path = os.path.join(output_dir, f"scorecard_{timestamp}.pdf")
         
         # Step 4: Generate PDF
         pdf_generated = False
         try:
-            async with async_playwright() as p:
-                browser = await p.chromium.launch()
-                page = await browser.new_page()
-                await page.set_content(html_output, wait_until='networkidle')
-                
-                # Generate PDF bytes
-                pdf_bytes = await page.pdf(
-                    format='A4',
-                    print_background=True,
-                    margin={
-                        'top': '20mm',
-                        'right': '15mm',
-                        'bottom': '20mm',
-                        'left': '15mm'
-                    }
-                )
-                await browser.close()
-                pdf_generated = True
-                
-                # Save PDF to file if requested
-                if save_files and pdf_path:
-                    with open(pdf_path, 'wb') as f:
-                        f.write(pdf_bytes)
+            async with _pdf_render_semaphore:
+                if browser is not None:
+                    pdf_bytes = await _render_pdf(browser, html_output, pdf_path)
+                else:
+                    async with async_playwright() as p:
+                        own_browser = await p.chromium.launch()
+                        try:
+                            pdf_bytes = await _render_pdf(own_browser, html_output, pdf_path)
+                        finally:
+                            await own_browser.close()
+            pdf_generated = True
                         
         except Exception as pdf_error:
             print(f"Warning: PDF generation failed: {pdf_error}")
             pdf_bytes = None
             pdf_path = None
         
-        # Step 5: Add PDF download link to HTML if requested and PDF was generated
-        if include_pdf_link_in_html and pdf_generated and pdf_bytes:
+        # Step 5: Add the embedded PDF link, or drop the /download link if there is no PDF
+        if include_pdf_link_in_html and standalone and pdf_generated and pdf_bytes:
             # Create base64 data URL for PDF
             pdf_base64 = base64.b64encode(pdf_bytes).decode('utf-8')
             pdf_data_url = f"data:application/pdf;base64,{pdf_base64}"
-            
-            pdf_download_link = f"""
-            <div style="background-color: #e7f3ff; padding: 15px; border-radius: 8px; margin-bottom: 20px; border-left: 4px solid #667eea;">
-                <p style="margin: 0;"><strong>📄 PDF Available:</strong> 
-                <a href="{pdf_data_url}" download="scorecard_{timestamp}.pdf" style="color: #667eea; text-decoration: underline; font-weight: bold;">
-                    Download PDF Scorecard
-                </a>
-                </p>
-            </div>
-            """
-            html_output = pdf_download_link + html_output
+            html_output = create_html_output(
+                score_data, prefix_html=_pdf_link_banner(pdf_data_url, timestamp), generated=generated
+            )
+        elif link_in_html and not pdf_generated:
+            html_output = create_html_output(score_data, generated=generated)
         
         # Step 6: Save HTML file if requested
         if save_files and html_path:
-            with open(html_path, 'w', encoding='utf-8') as f:
-                f.write(html_output)
+            await asyncio.to_thread(_write_html, html_path, html_output)
         
         # Return complete result
         return {
@@ -217,6 +269,7 @@ async def generate_scorecard(
         }
     
     except Exception as e:
+        logger.error("Error processing transcript", exc_info=True)
         error_msg = f"Error processing transcript: {str(e)}"
         return {
             'success': False,
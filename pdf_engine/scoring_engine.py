@@ -3,34 +3,105 @@ Scoring engine for interview transcripts
 Implements the 7-criteria scoring rubric with 0/2/4 marking system
 Uses Anthropic Claude LLM for candidate assessment
 """
-from typing import Dict, Any, List
-import json
+from typing import Dict, Any, List, Optional
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import copy
+import hashlib
 import os
 import logging
-from anthropic import Anthropic
+import threading
+import time
+from anthropic import Anthropic, AsyncAnthropic
 from dotenv import load_dotenv
 
-# Set up logging
-logging.basicConfig(level=logging.DEBUG)
+# Logging is configured by the application (see main_server.py)
 logger = logging.getLogger(__name__)
 
 # Load environment variables
 load_dotenv()
 
-# Initialize Anthropic client
-def get_anthropic_client() -> Anthropic:
-    """
-    Initialize and return Anthropic client
-    """
+# Retries per call on rate limits (429), timeouts and 5xx errors; the SDK backs off
+# exponentially with jitter and honors the Retry-After header
+SCORING_MAX_RETRIES = int(os.getenv("SCORING_MAX_RETRIES", "5"))
+
+# Shared Anthropic clients, so their connection pools are reused across requests
+_client: Optional[Anthropic] = None
+_async_client: Optional[AsyncAnthropic] = None
+
+def _get_api_key() -> str:
     api_key = os.getenv("ANTHROPIC_API_KEY")
     if not api_key:
         raise ValueError(
             "ANTHROPIC_API_KEY not found. Please set it as an environment variable or in a .env file."
         )
-    return Anthropic(api_key=api_key)
+    return api_key
+
+def get_anthropic_client() -> Anthropic:
+    """
+    Return the shared Anthropic client, creating it on first use
+    """
+    global _client
+    if _client is None:
+        _client = Anthropic(api_key=_get_api_key(), max_retries=SCORING_MAX_RETRIES)
+    return _client
+
+def get_async_anthropic_client() -> AsyncAnthropic:
+    """
+    Return the shared async Anthropic client, creating it on first use
+    """
+    global _async_client
+    if _async_client is None:
+        _async_client = AsyncAnthropic(api_key=_get_api_key(), max_retries=SCORING_MAX_RETRIES)
+    return _async_client
+
+# Cap on in-flight async scoring calls, so bursts queue here instead of hitting rate limits (429)
+SCORING_MAX_CONCURRENCY = int(os.getenv("SCORING_MAX_CONCURRENCY", "10"))
+_scoring_semaphore = asyncio.Semaphore(SCORING_MAX_CONCURRENCY)
+
+# Analyses of recently scored transcripts, keyed by a hash of the exact text
+ANALYSIS_CACHE_SIZE = int(os.getenv("SCORING_CACHE_SIZE", "256"))
+_analysis_cache: "OrderedDict[bytes, Dict[str, Any]]" = OrderedDict()
+_analysis_cache_lock = threading.Lock()
+
+def _transcript_key(transcript_text: str) -> bytes:
+    return hashlib.blake2b(transcript_text.encode("utf-8"), digest_size=16).digest()
+
+def _cached_analysis(key: bytes) -> Optional[Dict[str, Any]]:
+    with _analysis_cache_lock:
+        result = _analysis_cache.get(key)
+        if result is None:
+            return None
+        _analysis_cache.move_to_end(key)
+    return copy.deepcopy(result)
+
+def _cache_analysis(key: bytes, result: Dict[str, Any]) -> None:
+    if ANALYSIS_CACHE_SIZE <= 0:
+        return
+    with _analysis_cache_lock:
+        _analysis_cache[key] = copy.deepcopy(result)
+        _analysis_cache.move_to_end(key)
+        while len(_analysis_cache) > ANALYSIS_CACHE_SIZE:
+            _analysis_cache.popitem(last=False)
+
+# Transcripts with fewer words than this are scored as insufficient without calling the LLM
+MIN_SCORING_WORDS = int(os.getenv("MIN_SCORING_WORDS", "50"))
+
+# Fast model sampled twice per transcript; the stronger model is only called when
+# the samples disagree on a level, or for transcripts too long to trust the fast model
+SCORING_MODEL = os.getenv("SCORING_MODEL", "claude-haiku-4-5")
+SCORING_ESCALATION_MODEL = os.getenv("SCORING_ESCALATION_MODEL", "claude-sonnet-4-5")
+SCORING_ESCALATION_WORDS = int(os.getenv("SCORING_ESCALATION_WORDS", "6000"))
+
+# Seconds between status checks while a scoring batch is processing
+BATCH_POLL_INTERVAL = 30
 
-# Scoring Rubric Definition
-SCORING_RUBRIC = [
+# Seconds to wait for a scoring batch before cancelling it (batches expire after 24 hours anyway)
+BATCH_TIMEOUT = 24 * 60 * 60
+
+# Scoring Rubric Definition: role-based skills (0/2/4), then cultural fit (0/1/2)
+ROLE_BASED_RUBRIC = [
     {
         "criterion": "Analytical thinking and problem solving",
         "poor": "Struggles to break down problems and identify root causes. Requires significant guidance.",
@@ -60,7 +131,10 @@ SCORING_RUBRIC = [
         "mark_basic": 2,
         "mark_advanced": 4,
         "max_score": 4
-    },
+    }
+]
+
+CULTURAL_FIT_RUBRIC = [
     {
         "criterion": "Ambition / High standards",
         "poor": "Accepts average or adequate results; rarely pushes beyond minimum requirements or seeks opportunities for improvement.",
@@ -103,254 +177,364 @@ SCORING_RUBRIC = [
     }
 ]
 
-def analyze_transcript_with_llm(transcript_text: str) -> Dict[str, Any]:
+# Every criterion in scorecard order
+SCORING_RUBRIC = ROLE_BASED_RUBRIC + CULTURAL_FIT_RUBRIC
+
+# Scorecard position of each criterion name
+CRITERION_INDEX = {item["criterion"]: i for i, item in enumerate(SCORING_RUBRIC)}
+
+# Max score, and mark per level, for each scorecard position
+MAX_SCORE_BY_INDEX = [item["max_score"] for item in SCORING_RUBRIC]
+EXPECTED_MARK_BY_INDEX = [
+    {level: item[f"mark_{level.lower()}"] for level in ("Poor", "Basic", "Advanced")}
+    for item in SCORING_RUBRIC
+]
+
+# Total available: 3 role-based (4 each) + 4 cultural fit (2 each) = 12 + 8 = 20
+MAX_SCORE = sum(MAX_SCORE_BY_INDEX)
+
+# Answers are returned as a forced call to this tool, so the API enforces the JSON shape
+SCORING_TOOL = {
+    "name": "record_scorecard",
+    "description": "Record the level and justification for each of the 7 criteria, and the feedback for the candidate.",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "scores": {
+                "type": "array",
+                "description": "One entry per criterion, in scorecard order",
+                "minItems": 7,
+                "maxItems": 7,
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "criterion": {"type": "string", "enum": [item["criterion"] for item in SCORING_RUBRIC]},
+                        "level": {"type": "string", "enum": ["Poor", "Basic", "Advanced"]},
+                        "justification": {"type": "string"}
+                    },
+                    "required": ["criterion", "level", "justification"]
+                }
+            },
+            "feedback": {
+                "type": "object",
+                "properties": {
+                    "positive": {"type": "array", "items": {"type": "string"}, "minItems": 2, "maxItems": 2},
+                    "negative": {"type": "array", "items": {"type": "string"}, "minItems": 2, "maxItems": 2}
+                },
+                "required": ["positive", "negative"]
+            }
+        },
+        "required": ["scores", "feedback"]
+    }
+}
+
+def insufficient_transcript_analysis() -> Dict[str, Any]:
+    """
+    All-Poor analysis for a transcript too short to evaluate, in the shape parse_llm_response returns
+    """
+    return {
+        "scores": [
+            {
+                "criterion": item["criterion"],
+                "level": "Poor",
+                "mark": item["mark_poor"],
+                "justification": "Transcript too short to evaluate"
+            }
+            for item in SCORING_RUBRIC
+        ],
+        "feedback": {
+            "positive": ["N/A", "N/A"],
+            "negative": [
+                "Transcript too short to evaluate",
+                f"Provide a transcript of at least {MIN_SCORING_WORDS} words to get a full assessment"
+            ]
+        }
+    }
+
+def is_scorable(word_count: int) -> bool:
+    """
+    Whether a transcript of word_count words is worth an LLM call
+    """
+    return word_count >= max(MIN_SCORING_WORDS, 1)
+
+def analyze_transcript_with_llm(transcript_text: str, word_count: Optional[int] = None) -> Dict[str, Any]:
     """
     Analyze transcript using Anthropic Claude LLM.
     
+    Two samples from SCORING_MODEL, requested in parallel, are compared; when their levels disagree, or the
+    transcript is longer than SCORING_ESCALATION_WORDS, SCORING_ESCALATION_MODEL decides.
+    
     Args:
         transcript_text: The interview transcript
+        word_count: Words in transcript_text, when the caller has already counted them
         
     Returns:
         Dictionary with scores array matching the JSON schema
         
     Raises:
-        ValueError: If Anthropic API key is not set
-        Exception: If API call fails
+        ValueError: If Anthropic API key is not set or the answer is invalid
+        anthropic.APIError: If the API call fails after the client's retries
     """
-    try:
-        logger.info("Starting LLM analysis...")
-        client = get_anthropic_client()
-        
-        # Get system instruction
-        system_instruction = get_system_instruction()
-        
-        # Prepare the user message with transcript
-        user_message = f"Interview transcript:\n\n{transcript_text}\n\nPlease respond ONLY with valid JSON matching the specified format."
-        
-        # Call Anthropic API
-        response = client.messages.create(
-            model="claude-sonnet-4-5",  # Using Claude 3.5 Sonnet for best analysis
-            max_tokens=4096,
-            temperature=0.3,  # Lower temperature for more consistent scoring
-            system=system_instruction,
-            messages=[
-                {"role": "user", "content": user_message}
-            ]
+    key = _transcript_key(transcript_text)
+    cached = _cached_analysis(key)
+    if cached is not None:
+        logger.info("Reusing the analysis of an identical transcript")
+        return cached
+    
+    logger.info("Starting LLM analysis...")
+    if _starts_escalated(transcript_text, word_count):
+        result = _request_analysis(transcript_text, SCORING_ESCALATION_MODEL)
+    else:
+        # The second sample runs on a worker thread so both round trips overlap
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            second = pool.submit(_request_analysis, transcript_text, SCORING_MODEL)
+            result = _request_analysis(transcript_text, SCORING_MODEL)
+            second = second.result()
+        if not _levels_agree(result, second):
+            result = _request_analysis(transcript_text, SCORING_ESCALATION_MODEL)
+    
+    _cache_analysis(key, result)
+    return result
+
+async def analyze_transcript_with_llm_async(transcript_text: str, word_count: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Async variant of analyze_transcript_with_llm; the two samples are requested in parallel
+    and at most SCORING_MAX_CONCURRENCY calls run at once.
+    
+    Raises:
+        ValueError: If Anthropic API key is not set or the answer is invalid
+        anthropic.APIError: If the API call fails after the client's retries
+    """
+    key = _transcript_key(transcript_text)
+    cached = _cached_analysis(key)
+    if cached is not None:
+        logger.info("Reusing the analysis of an identical transcript")
+        return cached
+    
+    if _starts_escalated(transcript_text, word_count):
+        result = await _request_analysis_async(transcript_text, SCORING_ESCALATION_MODEL)
+    else:
+        result, second = await asyncio.gather(
+            _request_analysis_async(transcript_text, SCORING_MODEL),
+            _request_analysis_async(transcript_text, SCORING_MODEL),
         )
+        if not _levels_agree(result, second):
+            result = await _request_analysis_async(transcript_text, SCORING_ESCALATION_MODEL)
+    
+    _cache_analysis(key, result)
+    return result
+
+def _starts_escalated(transcript_text: str, word_count: Optional[int]) -> bool:
+    """
+    Whether to skip the self-consistency check and go straight to the escalation model
+    """
+    if SCORING_MODEL == SCORING_ESCALATION_MODEL:
+        return True
+    if word_count is None:
+        word_count = len(transcript_text.split())
+    return word_count > SCORING_ESCALATION_WORDS
+
+def _levels_agree(first: Dict[str, Any], second: Dict[str, Any]) -> bool:
+    agree = [score["level"] for score in first["scores"]] == [score["level"] for score in second["scores"]]
+    if not agree:
+        logger.info("%s samples disagree; escalating to %s", SCORING_MODEL, SCORING_ESCALATION_MODEL)
+    return agree
+
+def _request_analysis(transcript_text: str, model: str) -> Dict[str, Any]:
+    response = get_anthropic_client().messages.create(**build_request_params(transcript_text, model))
+    return _parse_response(response)
+
+async def _request_analysis_async(transcript_text: str, model: str) -> Dict[str, Any]:
+    client = get_async_anthropic_client()
+    async with _scoring_semaphore:
+        response = await client.messages.create(**build_request_params(transcript_text, model))
+    return _parse_response(response)
+
+def _parse_response(response: Any) -> Dict[str, Any]:
+    """
+    Validate a scoring response (shared by the sync and async paths)
+    """
+    logger.info(
+        "%s prompt cache: %d tokens read, %d tokens written",
+        response.model,
+        response.usage.cache_read_input_tokens or 0,
+        response.usage.cache_creation_input_tokens or 0,
+    )
+    result = parse_llm_response(response.content)
+    logger.info("Successfully processed LLM response")
+    return result
+
+def analyze_transcripts_batch(
+    transcripts: List[str],
+    poll_interval: float = BATCH_POLL_INTERVAL,
+    timeout: float = BATCH_TIMEOUT,
+) -> List[Optional[Dict[str, Any]]]:
+    """
+    Analyze many transcripts through the Message Batches API (half the per-token
+    price of individual calls; results may take minutes to hours). Each transcript
+    gets one SCORING_ESCALATION_MODEL answer, since a self-consistency check would
+    need a second batch round trip.
+    
+    Args:
+        transcripts: Interview transcripts to score
+        poll_interval: Seconds between batch status checks
+        timeout: Seconds to wait for the batch to end
         
-        # Extract and parse JSON response
-        content = response.content[0].text
-        logger.debug(f"Raw LLM response content: {content[:500]}...")  # Log first 500 chars
-        
-        # Clean the content - remove markdown code blocks if present
-        content = content.strip()
-        if content.startswith("```json"):
-            # Remove ```json at the start
-            content = content[7:].strip()
-        elif content.startswith("```"):
-            # Remove ``` at the start
-            content = content[3:].strip()
-        
-        if content.endswith("```"):
-            # Remove ``` at the end
-            content = content[:-3].strip()
+    Returns:
+        Analysis results in the same order as transcripts; None where a request
+        failed or its answer could not be parsed
         
+    Raises:
+        TimeoutError: If the batch has not ended within timeout (it is cancelled)
+    """
+    client = get_anthropic_client()
+    batch = client.messages.batches.create(
+        requests=[
+            {"custom_id": f"transcript-{i}", "params": build_request_params(transcript_text, SCORING_ESCALATION_MODEL)}
+            for i, transcript_text in enumerate(transcripts)
+        ]
+    )
+    logger.info("Submitted scoring batch %s with %d transcripts", batch.id, len(transcripts))
+    
+    deadline = time.monotonic() + timeout
+    while batch.processing_status != "ended":
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            client.messages.batches.cancel(batch.id)
+            raise TimeoutError(f"Scoring batch {batch.id} did not end within {timeout} seconds; cancelled it")
+        time.sleep(min(poll_interval, remaining))
+        batch = client.messages.batches.retrieve(batch.id)
+    
+    results: List[Optional[Dict[str, Any]]] = [None] * len(transcripts)
+    for entry in client.messages.batches.results(batch.id):
+        index = int(entry.custom_id.rsplit("-", 1)[1])
+        if entry.result.type != "succeeded":
+            logger.error("Batch request %s did not succeed: %s", entry.custom_id, entry.result.type)
+            continue
         try:
-            result = json.loads(content)
-            logger.debug(f"Parsed JSON result type: {type(result)}")
-            logger.debug(f"Result keys: {list(result.keys()) if isinstance(result, dict) else 'Not a dict'}")
-        except json.JSONDecodeError as e:
-            logger.error(f"JSON decode error: {e}")
-            logger.error(f"Content that failed to parse: {content}")
-            raise
-        
-        # Validate the response structure
-        if not isinstance(result, dict):
-            logger.error(f"Result is not a dictionary, it's: {type(result)}")
-            raise ValueError(f"Invalid response format: expected dict, got {type(result)}")
-        
-        if "scores" not in result:
-            logger.error(f"Missing 'scores' key. Available keys: {list(result.keys())}")
-            raise ValueError("Invalid response format: 'scores' key not found")
-        
-        # Validate that we have 7 scores
-        scores = result["scores"]
-        logger.debug(f"Scores type: {type(scores)}, length: {len(scores) if isinstance(scores, list) else 'N/A'}")
-        logger.debug(f"Scores content: {scores}")
-        
-        if not isinstance(scores, list):
-            logger.error(f"Scores is not a list, it's: {type(scores)}")
-            raise ValueError(f"Invalid response format: 'scores' should be a list, got {type(scores)}")
-        
-        if len(scores) != 7:
-            logger.warning(f"Expected 7 scores, got {len(scores)}")
-            raise ValueError(f"Expected 7 scores, got {len(scores)}")
-        
-        # Check if scores are just integers (wrong format) or proper objects
-        if scores and isinstance(scores[0], (int, float)):
-            logger.error(f"LLM returned scores as numbers instead of objects. Scores: {scores}")
-            raise ValueError(
-                "Invalid response format: 'scores' should be a list of objects with 'criterion', 'level', 'mark', and 'justification' fields. "
-                f"Got a list of numbers instead: {scores}. "
-                "Please ensure the LLM returns the correct format."
-            )
-        
-        # Validate feedback structure (optional, but preferred)
-        logger.debug(f"Checking feedback. Result type: {type(result)}, 'feedback' in result: {'feedback' in result if isinstance(result, dict) else 'N/A'}")
-        
-        if not isinstance(result, dict):
-            logger.error(f"Result is not a dict when checking feedback: {type(result)}")
-            result = {}
-        
-        feedback_value = result.get("feedback")
-        logger.debug(f"Feedback value type: {type(feedback_value)}, value: {feedback_value}")
-        
-        if "feedback" not in result or not isinstance(feedback_value, dict):
-            logger.warning(f"Feedback missing or invalid type. Creating placeholder. Type was: {type(feedback_value)}")
-            # Generate placeholder feedback if not provided or invalid type
-            result["feedback"] = {
-                "positive": ["Feedback generation pending", "Feedback generation pending"],
-                "negative": ["Feedback generation pending", "Feedback generation pending"]
-            }
-        else:
-            feedback = result["feedback"]
-            logger.debug(f"Processing feedback dict: {feedback}")
-            # Ensure feedback is a dictionary
-            if not isinstance(feedback, dict):
-                logger.warning(f"Feedback is not a dict, it's: {type(feedback)}. Creating new dict.")
-                feedback = {}
-                result["feedback"] = feedback
-            
-            # Validate and fix positive arguments
-            positive_value = feedback.get("positive")
-            logger.debug(f"Positive value type: {type(positive_value)}, value: {positive_value}")
-            if "positive" not in feedback or not isinstance(positive_value, list):
-                logger.warning(f"Positive missing or not a list. Type was: {type(positive_value)}")
-                feedback["positive"] = []
-            if len(feedback["positive"]) < 2:
-                needed = 2 - len(feedback["positive"])
-                logger.debug(f"Adding {needed} placeholder positive feedback items")
-                feedback["positive"] = feedback["positive"] + ["Feedback generation pending"] * needed
-            
-            # Validate and fix negative arguments
-            negative_value = feedback.get("negative")
-            logger.debug(f"Negative value type: {type(negative_value)}, value: {negative_value}")
-            if "negative" not in feedback or not isinstance(negative_value, list):
-                logger.warning(f"Negative missing or not a list. Type was: {type(negative_value)}")
-                feedback["negative"] = []
-            if len(feedback["negative"]) < 2:
-                needed = 2 - len(feedback["negative"])
-                logger.debug(f"Adding {needed} placeholder negative feedback items")
-                feedback["negative"] = feedback["negative"] + ["Feedback generation pending"] * needed
-        
-        # Validate each score has required fields
-        required_fields = ["criterion", "level", "mark", "justification"]
-        for i, score in enumerate(scores):
-            logger.debug(f"Validating score {i}: type={type(score)}, value={score}")
-            
-            # Check if score is a dictionary
-            if not isinstance(score, dict):
-                logger.error(f"Score {i} is not a dictionary, it's: {type(score)}, value: {score}")
-                raise ValueError(f"Score {i} should be a dictionary with fields {required_fields}, got {type(score)}: {score}")
-            
-            # Validate required fields
-            for field in required_fields:
-                if field not in score:
-                    logger.error(f"Score {i} missing required field: {field}. Available fields: {list(score.keys())}")
-                    raise ValueError(f"Score {i} missing required field: {field}")
-            
-            # Validate level and mark match
-            level = score["level"]
-            mark = score["mark"]
-            criterion_name = score.get("criterion", "")
-            
-            # Find the max_score for this criterion
-            max_score = 4  # default
-            for rubric_item in SCORING_RUBRIC:
-                if rubric_item["criterion"] == criterion_name:
-                    max_score = rubric_item.get("max_score", 4)
-                    break
-            
-            if level == "Poor" and mark != 0:
-                score["mark"] = 0  # Auto-correct
-            elif level == "Basic":
-                if max_score == 4 and mark != 2:
-                    score["mark"] = 2  # Auto-correct for role-based
-                elif max_score == 2 and mark != 1:
-                    score["mark"] = 1  # Auto-correct for cultural fit
-            elif level == "Advanced":
-                if max_score == 4 and mark != 4:
-                    score["mark"] = 4  # Auto-correct for role-based
-                elif max_score == 2 and mark != 2:
-                    score["mark"] = 2  # Auto-correct for cultural fit
-        
-        logger.info("Successfully processed LLM response")
-        return result
+            results[index] = parse_llm_response(entry.result.message.content)
+        except ValueError as e:
+            logger.error("Invalid answer for batch request %s: %s", entry.custom_id, e)
+    return results
+
+def build_request_params(transcript_text: str, model: str = SCORING_MODEL) -> Dict[str, Any]:
+    """
+    Build the Messages API parameters for scoring one transcript (shared by single and batch calls)
+    """
+    # Prepare the user message with transcript
+    user_message = f"Interview transcript:\n\n{transcript_text}"
+    
+    return {
+        "model": model,
+        "max_tokens": 4096,
+        "temperature": 0.3,  # Lower temperature for more consistent scoring
+        # Byte-identical for every transcript, so it is marked as a cacheable prompt prefix
+        "system": [
+            {"type": "text", "text": SYSTEM_INSTRUCTION, "cache_control": {"type": "ephemeral"}}
+        ],
+        "tools": [SCORING_TOOL],
+        "tool_choice": {"type": "tool", "name": SCORING_TOOL["name"]},
+        "messages": [
+            {"role": "user", "content": user_message}
+        ]
+    }
+
+def parse_llm_response(content: List[Any]) -> Dict[str, Any]:
+    """
+    Extract the scorecard from the LLM's forced tool call and fill in each mark from its level.
+    
+    Args:
+        content: Content blocks of the Messages API response
         
-    except json.JSONDecodeError as e:
-        logger.error(f"JSON decode error: {e}", exc_info=True)
-        raise ValueError(f"Failed to parse JSON response from Anthropic: {str(e)}")
-    except ValueError as e:
-        logger.error(f"ValueError in LLM analysis: {e}", exc_info=True)
-        raise
-    except Exception as e:
-        logger.error(f"Unexpected error in LLM analysis: {e}", exc_info=True)
-        logger.error(f"Error type: {type(e)}")
-        import traceback
-        logger.error(f"Traceback: {traceback.format_exc()}")
-        raise Exception(f"Error calling Anthropic API: {str(e)}")
+    Raises:
+        ValueError: If the answer has no scorecard tool call or does not cover the 7 criteria
+    """
+    tool_call = next(
+        (block for block in content if block.type == "tool_use" and block.name == SCORING_TOOL["name"]),
+        None,
+    )
+    if tool_call is None:
+        raise ValueError(f"Invalid response format: no '{SCORING_TOOL['name']}' tool call in the answer")
+    
+    result = tool_call.input
+    logger.debug("Scorecard tool input: %s", result)
+    
+    scores = result.get("scores")
+    if not isinstance(scores, list) or len(scores) != 7:
+        raise ValueError(f"Expected 7 scores, got {scores!r}")
+    
+    # Put the scores in scorecard order, so each position lines up with its rubric entry
+    ordered: List[Optional[Dict[str, Any]]] = [None] * len(SCORING_RUBRIC)
+    for score in scores:
+        try:
+            ordered[CRITERION_INDEX[score["criterion"]]] = score
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"Score has an unknown criterion: {score}") from e
+    if any(score is None for score in ordered):
+        raise ValueError(f"Expected one score per criterion, got {[score['criterion'] for score in scores]}")
+    
+    # The schema restricts level to known values, so the mark is a table lookup
+    for i, score in enumerate(ordered):
+        try:
+            score["mark"] = EXPECTED_MARK_BY_INDEX[i][score["level"]]
+        except KeyError as e:
+            raise ValueError(f"Score {i} has an unknown level: {score}") from e
+        if not isinstance(score.get("justification"), str):
+            raise ValueError(f"Score {i} has no justification: {score}")
+    
+    result["scores"] = ordered
+    
+    # Feedback is rendered as two bullet lists of strings; anything else gets the placeholder
+    feedback = result.get("feedback")
+    if not (
+        isinstance(feedback, dict)
+        and all(
+            isinstance(feedback.get(side), list) and all(isinstance(argument, str) for argument in feedback[side])
+            for side in ("positive", "negative")
+        )
+    ):
+        logger.warning("Invalid feedback in the answer, using the placeholder: %r", feedback)
+        result["feedback"] = placeholder_feedback()
+    
+    return result
+
+def placeholder_feedback() -> Dict[str, List[str]]:
+    """
+    Feedback shown when the analysis has none (or none in the expected shape)
+    """
+    return {
+        "positive": ["Feedback generation pending", "Feedback generation pending"],
+        "negative": ["Feedback generation pending", "Feedback generation pending"]
+    }
 
 def get_system_instruction() -> str:
     """
-    Generate the system instruction for LLM-based scoring
-    """
-    instruction = "You are an expert Interview Assessment AI. Your task is to analyze the provided interview transcript and assess the candidate based on the following 7 criteria. For each criterion, you must assign a **Level** (Poor, Basic, or Advanced) and provide a concise **Justification** based solely on the transcript evidence.\n\n"
-    instruction += "--- SCORING SYSTEM ---\n"
-    instruction += "**Role-based Skills (first 3 criteria):** Poor (0), Basic (2), Advanced (4) - Max score: 4 per criterion\n"
-    instruction += "**Cultural Fit (last 4 criteria):** Poor (0), Basic (1), Advanced (2) - Max score: 2 per criterion\n\n"
-    
-    instruction += "--- SCORECARD CRITERIA ---\n"
-    
-    for i, item in enumerate(SCORING_RUBRIC):
-        criterion = item["criterion"]
-        max_score = item.get("max_score", 4)
-        if i < 3:
-            instruction += f"\n**ROLE-BASED SKILL: {criterion}**\n"
-        else:
-            instruction += f"\n**CULTURAL FIT: {criterion}**\n"
-        instruction += f"Poor (0): {item['poor']}\n"
-        if max_score == 4:
-            instruction += f"Basic (2): {item['basic']}\n"
-            instruction += f"Advanced (4): {item['advanced']}\n"
-        else:
-            instruction += f"Basic (1): {item['basic']}\n"
-            instruction += f"Advanced (2): {item['advanced']}\n"
-    
-    instruction += "\n--- FEEDBACK GENERATION ---\n"
-    instruction += "In addition to the scores, you must generate feedback arguments for the candidate:\n"
-    instruction += "- 2 positive arguments (things the candidate did well or strengths demonstrated)\n"
-    instruction += "- 2 negative arguments (areas for improvement or weaknesses observed)\n"
-    instruction += "These should be specific, constructive, and based on evidence from the transcript.\n"
-    instruction += "IMPORTANT: Write the feedback arguments using 'you' to directly address the candidate (e.g., 'You demonstrated...' not 'The candidate demonstrated...'). Make it personal and direct.\n"
-    
-    instruction += "\n--- OUTPUT FORMAT ---\n"
-    instruction += "You MUST respond ONLY with a single JSON object that adheres to the following schema. DO NOT include any explanatory text, markdown formatting (like ```json), or notes outside the JSON structure itself.\n"
-    instruction += 'The JSON MUST have this EXACT structure:\n'
-    instruction += '{\n'
-    instruction += '  "scores": [\n'
-    instruction += '    {"criterion": "Analytical thinking and problem solving", "level": "Advanced", "mark": 4, "justification": "..."},\n'
-    instruction += '    {"criterion": "Mastering analytical toolset (Python, ...)", "level": "Basic", "mark": 2, "justification": "..."},\n'
-    instruction += '    ... (7 total score objects, one for each criterion)\n'
-    instruction += '  ],\n'
-    instruction += '  "feedback": {\n'
-    instruction += '    "positive": ["arg1", "arg2"],\n'
-    instruction += '    "negative": ["arg3", "arg4"]\n'
-    instruction += '  }\n'
-    instruction += '}\n'
-    instruction += "\nCRITICAL: The 'scores' array MUST contain objects (dictionaries), NOT numbers. Each object must have 'criterion', 'level', 'mark', and 'justification' fields.\n"
-    instruction += "IMPORTANT: For Cultural Fit criteria (last 4), marks are: Poor=0, Basic=1, Advanced=2. For Role-based Skills (first 3), marks are: Poor=0, Basic=2, Advanced=4."
-    
-    return instruction
+    Generate the system instruction for LLM-based scoring. Marks are derived from
+    levels in code and the tool schema fixes the answer shape, so neither is restated here.
+    """
+    parts = ["You are an expert interview assessor. Rate the candidate on each of the 7 criteria below as Poor, Basic or Advanced, with a concise justification based solely on transcript evidence.\n"]
+    
+    parts.append(_rubric_section("Role-based skills", ROLE_BASED_RUBRIC))
+    parts.append(_rubric_section("Cultural fit", CULTURAL_FIT_RUBRIC))
+    
+    parts.append("\n## Feedback\n")
+    parts.append("Give 2 positive and 2 negative arguments: specific, constructive, evidence-based, and addressed to the candidate as 'you' (e.g. 'You demonstrated...').\n")
+    
+    parts.append("\nRecord your assessment with the record_scorecard tool, one score per criterion in the order listed above.")
+    
+    return "".join(parts)
+
+def _rubric_section(title: str, rubric: List[Dict[str, Any]]) -> str:
+    return f"\n## {title}\n" + "".join(
+        f"\n**{item['criterion']}**\n"
+        f"- Poor: {item['poor']}\n"
+        f"- Basic: {item['basic']}\n"
+        f"- Advanced: {item['advanced']}\n"
+        for item in rubric
+    )
+
+# Built once at import; every request sends this exact string
+SYSTEM_INSTRUCTION = get_system_instruction()
 
 def generate_score(transcript_text: str) -> Dict[str, Any]:
     """
@@ -362,63 +546,107 @@ def generate_score(transcript_text: str) -> Dict[str, Any]:
     Returns:
         Dictionary containing:
         - overall_grade: Overall score/grade
-        - total_score: Total marks out of 28 (7 criteria × 4 max)
-        - max_score: Maximum possible score (28)
+        - total_score: Total marks out of MAX_SCORE
+        - max_score: Maximum possible score (MAX_SCORE, 20)
         - categories: List of category scores with justifications
         - scores: Raw scores array from LLM analysis
         - transcript_length: Length of transcript
         - word_count: Word count
     """
-    # Basic metrics
     word_count = len(transcript_text.split())
-    char_count = len(transcript_text)
+    if not is_scorable(word_count):
+        return build_score(transcript_text, insufficient_transcript_analysis(), word_count)
+    return build_score(transcript_text, analyze_transcript_with_llm(transcript_text, word_count), word_count)
+
+async def generate_score_async(transcript_text: str) -> Dict[str, Any]:
+    """
+    Async variant of generate_score, for callers running on an event loop
+    """
+    word_count = len(transcript_text.split())
+    if not is_scorable(word_count):
+        return build_score(transcript_text, insufficient_transcript_analysis(), word_count)
+    return build_score(transcript_text, await analyze_transcript_with_llm_async(transcript_text, word_count), word_count)
+
+async def generate_scores_async(transcripts: List[str]) -> List[Optional[Dict[str, Any]]]:
+    """
+    Score many transcripts concurrently, bounded by SCORING_MAX_CONCURRENCY. Results arrive in
+    seconds, unlike generate_scores, at the full per-token price.
     
-    # Analyze transcript (placeholder - integrate LLM here)
-    analysis_result = analyze_transcript_with_llm(transcript_text)
-    scores = analysis_result.get("scores", [])
+    Returns:
+        One generate_score-style dictionary per transcript, in order; None where scoring failed
+    """
+    results = await asyncio.gather(
+        *(generate_score_async(transcript_text) for transcript_text in transcripts),
+        return_exceptions=True,
+    )
+    scores: List[Optional[Dict[str, Any]]] = []
+    for i, result in enumerate(results):
+        if isinstance(result, BaseException):
+            logger.error("Scoring transcript %d failed: %s", i, result)
+            result = None
+        scores.append(result)
+    return scores
+
+def generate_scores(transcripts: List[str]) -> List[Optional[Dict[str, Any]]]:
+    """
+    Score many transcripts in one Message Batches request (see analyze_transcripts_batch).
     
-    # Calculate total score
-    total_score = sum(score.get("mark", 0) for score in scores)
-    # Max score: 3 role-based (4 each) + 4 cultural fit (2 each) = 12 + 8 = 20
-    max_score = 20
-    percentage = (total_score / max_score * 100) if max_score > 0 else 0
+    Returns:
+        One generate_score-style dictionary per transcript, in order; None where scoring failed
+        
+    Raises:
+        TimeoutError: If the batch does not end within BATCH_TIMEOUT
+    """
+    # Only transcripts long enough to evaluate are sent in the batch
+    word_counts = [len(transcript_text.split()) for transcript_text in transcripts]
+    scorable = [i for i, word_count in enumerate(word_counts) if is_scorable(word_count)]
+    analyses: List[Optional[Dict[str, Any]]] = [insufficient_transcript_analysis() for _ in transcripts]
+    if scorable:
+        for i, analysis_result in zip(scorable, analyze_transcripts_batch([transcripts[i] for i in scorable])):
+            analyses[i] = analysis_result
+    return [
+        build_score(transcript_text, analysis_result, word_count) if analysis_result is not None else None
+        for transcript_text, analysis_result, word_count in zip(transcripts, analyses, word_counts)
+    ]
+
+def build_score(transcript_text: str, analysis_result: Dict[str, Any], word_count: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Turn a validated LLM analysis into the scorecard dictionary returned by generate_score
+    """
+    # Basic metrics
+    if word_count is None:
+        word_count = len(transcript_text.split())
+    char_count = len(transcript_text)
     
-    # Final grade is the total score out of max score
-    final_grade = f"{total_score}/{max_score}"
+    scores = analysis_result["scores"]
     
-    # Format categories for display
+    # Format categories for display and total the marks in the same pass; every
+    # field is present once parse_llm_response has validated the analysis
+    total_score = 0
     categories = []
-    for score_item in scores:
-        criterion = score_item.get("criterion", "Unknown")
-        mark = score_item.get("mark", 0)
-        level = score_item.get("level", "Poor")
-        justification = score_item.get("justification", "")
-        
-        # Determine max_score based on criterion
-        criterion_max = 4  # default
-        for rubric_item in SCORING_RUBRIC:
-            if rubric_item["criterion"] == criterion:
-                criterion_max = rubric_item.get("max_score", 4)
-                break
-        
+    for score_item, criterion_max in zip(scores, MAX_SCORE_BY_INDEX):
+        mark = score_item["mark"]
+        total_score += mark
         categories.append({
-            "name": criterion,
+            "name": score_item["criterion"],
             "score": mark,
             "max_score": criterion_max,
-            "level": level,
-            "details": justification
+            "level": score_item["level"],
+            "details": score_item["justification"]
         })
     
+    percentage = total_score / MAX_SCORE * 100
+    
+    # Final grade is the total score out of max score
+    final_grade = f"{total_score}/{MAX_SCORE}"
+    
     # Extract feedback from analysis result
-    feedback = analysis_result.get("feedback", {
-        "positive": ["Feedback generation pending", "Feedback generation pending"],
-        "negative": ["Feedback generation pending", "Feedback generation pending"]
-    })
+    feedback = analysis_result.get("feedback") or placeholder_feedback()
     
     return {
         "overall_grade": final_grade,  # Now shows "X/20" instead of letter
         "total_score": total_score,
-        "max_score": max_score,
+        "max_score": MAX_SCORE,
         "percentage": percentage,
         "categories": categories,
         "scores": scores,  # Raw scores array
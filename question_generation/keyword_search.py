@@ -1,30 +1,105 @@
-async def search_def(model, keyword):
+import asyncio
+import re
+from collections import OrderedDict
 
-    messages = [
-        {"role": "system", "content": """You are a proficient pedagogue. You must explain in a single sentence the technical notion or entity {keyword} to a non-technical person. Your answer must be understandable in a few seconds. Return only the answer, no other text."""},
-        {"role": "user", "content": keyword},
-    ]
-    response = model.invoke(messages).content
+from langchain_core.messages import SystemMessage
+import orjson
 
-    return response
+from llm_limits import LLM_SEMAPHORE
 
-async def extract_keywords_and_def(model, text):
-    messages = [
-        {"role": "system", "content": """You must extract the technical keywords and entities that a non-technical recruiter might not know from the text you are given. 
+KEYWORDS_SYSTEM_PROMPT = """You must extract the technical keywords and entities that a non-technical recruiter might not know from the text you are given. 
         
         CRITICAL OUTPUT FORMAT REQUIREMENTS:
             - Separate each keyword with the delimiter: " ||| "
             - Do NOT include numbering (no 1., 2., etc.)
             - Do NOT include any introductory text, explanations, or concluding remarks
             - Do NOT use newlines between keywords
-            - Your entire response must be ONLY the five questions separated by " ||| "
+            - Your entire response must be ONLY the keywords separated by " ||| "
             - YOUR OUTPUT MUST BE IN ASCII CHARACTER SET. NO em-dash.
             Example format:
-            Keyword1 ||| Keyword2 ||| Keyword3 ||| Keyword4"""},
+            Keyword1 ||| Keyword2 ||| Keyword3 ||| Keyword4"""
+
+# Splits the " ||| "-delimited keyword list, swallowing the surrounding whitespace
+_KW_SPLIT = re.compile(r'\s*\|\|\|\s*')
+
+# Process-wide LRU of keyword definitions, keyed on the lowercased keyword
+_DEFINITION_CACHE_SIZE = 4096
+_definition_cache = OrderedDict()
+
+# Room for one sentence per keyword when defining them all in a single call
+BATCH_DEFINE_MAX_TOKENS = 1024
+
+def _cached_definition(keyword):
+    key = keyword.lower()
+    if key in _definition_cache:
+        _definition_cache.move_to_end(key)
+        return _definition_cache[key]
+    return None
+
+def _cache_definition(keyword, definition):
+    _definition_cache[keyword.lower()] = definition
+    if len(_definition_cache) > _DEFINITION_CACHE_SIZE:
+        _definition_cache.popitem(last=False)
+
+async def search_def(model, keyword):
+    cached = _cached_definition(keyword)
+    if cached is not None:
+        return cached
+
+    messages = [
+        {"role": "system", "content": """You are a proficient pedagogue. You must explain in a single sentence the technical notion or entity {keyword} to a non-technical person. Your answer must be understandable in a few seconds. Return only the answer, no other text."""},
+        {"role": "user", "content": keyword},
+    ]
+    async with LLM_SEMAPHORE:
+        response = (await model.ainvoke(messages)).content
+
+    _cache_definition(keyword, response)
+    return response
+
+async def batch_define(model, keywords):
+    """Define all keywords in one call; raises ValueError if the answer is not a JSON object"""
+    messages = [
+        {"role": "system", "content": """You are a proficient pedagogue. For each technical notion or entity you are given (one per line), explain it in a single sentence to a non-technical person. Each answer must be understandable in a few seconds.
+        Return ONLY a JSON object mapping each term, exactly as given, to its explanation. No other text."""},
+        {"role": "user", "content": "\n".join(keywords)},
+    ]
+    async with LLM_SEMAPHORE:
+        response = (await model.ainvoke(messages, max_tokens=BATCH_DEFINE_MAX_TOKENS)).content
+
+    definitions = orjson.loads(response[response.find("{"):response.rfind("}") + 1])
+    if not isinstance(definitions, dict):
+        raise ValueError("Expected a JSON object of definitions")
+    return {keyword: definitions[keyword] for keyword in keywords if isinstance(definitions.get(keyword), str)}
+
+async def extract_keywords_and_def(model, text):
+    messages = [
+        SystemMessage(content=[{"type": "text", "text": KEYWORDS_SYSTEM_PROMPT, "cache_control": {"type": "ephemeral"}}]),
         {"role": "user", "content": text},
     ]
-    Response = model.invoke(messages).content
+    async with LLM_SEMAPHORE:
+        Response = (await model.ainvoke(messages)).content
+
+    keywords = [keyword for keyword in _KW_SPLIT.split(Response.strip()) if keyword]
+    definitions = {}
+    for keyword in keywords:
+        cached = _cached_definition(keyword)
+        if cached is not None:
+            definitions[keyword] = cached
+
+    missing = [keyword for keyword in keywords if keyword not in definitions]
+    if missing:
+        try:
+            defined = await batch_define(model, missing)
+        except ValueError as e: # orjson.JSONDecodeError is a ValueError
+            print(f"Batch definition failed, defining keywords one by one: {e}")
+            defined = {}
+        for keyword, definition in defined.items():
+            _cache_definition(keyword, definition)
+        definitions.update(defined)
+
+        # Fall back to one call per keyword for anything the batch left out
+        remaining = [keyword for keyword in missing if keyword not in defined]
+        results = await asyncio.gather(*(search_def(model, keyword) for keyword in remaining))
+        definitions.update(zip(remaining, results))
 
-    keywords = Response.split('|||')
-    keywords = {keyword.strip():await search_def(model,keyword) for keyword in (keywords)}
-    return keywords
\ No newline at end of file
+    return {keyword: definitions[keyword] for keyword in keywords}
\ No newline at end of file
@@ -0,0 +1,7 @@
+import asyncio
+import os
+
+# Shared cap on in-flight LLM requests across every connection, so bursts of
+# candidates queue here instead of hitting the provider's rate limit (429)
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_SEMAPHORE = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
@@ -3,22 +3,54 @@ import uvicorn
 import question_generation as generate_questions
 import keyword_search
 import os
+import asyncio
 from langchain_anthropic import ChatAnthropic
 from linkup import LinkupClient
-import json
+import orjson
+from collections import deque
+from dataclasses import dataclass, field
 
-TRANSCRIPT = ""
-CANDIDATE_INFOS = {}
+TRANSCRIPT_WINDOW = 500 # Keep a limited window of the transcript
+MAX_CHUNK_CHARS = 64_000 # Reject oversized transcript chunks
+WS_MAX_SIZE = 1024 * 1024 # Bytes per incoming WebSocket message
 ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY")
 if not ANTHROPIC_API_KEY:
     raise ValueError("ANTHROPIC_API_KEY is not set")
 LINKUP_API_KEY = os.getenv("LINKUP_API_KEY")
 if not LINKUP_API_KEY:
     raise ValueError("LINKUP_API_KEY is not set")
-CV = ""
-JOB_OFFER = ""
-COMPANY_VALUES = ""
-KEYWORDS = {}
+
+
+@dataclass
+class SessionState:
+    """State of a single WebSocket connection, dropped when it closes"""
+    transcript_chunks: deque = field(default_factory=deque)
+    transcript_len: int = 0
+    candidate_infos: dict = field(default_factory=dict)
+    cv: str = ""
+    job_offer: str = ""
+    company_values: str = ""
+    keywords: dict = field(default_factory=dict)
+    role_context: str = "" # Job offer and company values, shared by every candidate for the role
+    context: str = "" # Role context and CV, rebuilt on CANDIDATE_INFOS only
+
+    def __post_init__(self):
+        self.update_context()
+
+    def add_transcript_chunk(self, chunk):
+        self.transcript_chunks.append(chunk)
+        self.transcript_len += len(chunk)
+        # Drop old chunks once the rest still covers the window
+        while self.transcript_len - len(self.transcript_chunks[0]) >= TRANSCRIPT_WINDOW:
+            self.transcript_len -= len(self.transcript_chunks.popleft())
+
+    def update_context(self):
+        self.role_context = "#Job offer : " + self.job_offer + "\n\n#Company values : " + self.company_values
+        self.context = self.role_context + "\n\n#Candidate profile : " + self.cv
+
+    def transcript_tail(self):
+        return "".join(self.transcript_chunks)[-TRANSCRIPT_WINDOW:]
+
 
 app = FastAPI()
 model = ChatAnthropic(
@@ -33,7 +65,7 @@ client = LinkupClient(api_key=LINKUP_API_KEY)
 
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
-    global TRANSCRIPT, CV, JOB_OFFER, CANDIDATE_INFOS, COMPANY_VALUES, KEYWORDS
+    state = SessionState()
     await websocket.accept()
     print("Client connected")
     try:
@@ -41,65 +73,89 @@ async def websocket_endpoint(websocket: WebSocket):
         while True:
             # Receive data from client
             data = await websocket.receive_text()
-            data = json.loads(data)
+            data = orjson.loads(data)
             print(f"Received: {data}")
             if data["event"] == "TRANSCRIPT_CHUNK":
+                if len(data["payload"]) >= MAX_CHUNK_CHARS:
+                    print(f"Transcript chunk too large: {len(data['payload'])} chars")
+                    await websocket.send_text(orjson.dumps({"event": "error", "payload": "Transcript chunk too large"}).decode())
+                    continue
                 counter += 1
-                TRANSCRIPT += data["payload"]
-                TRANSCRIPT = TRANSCRIPT[-500:] # Keep a limited window of the transcript
+                state.add_transcript_chunk(data["payload"])
                 # TODO : Identify keywords, Only if smooth
-                for keyword, definition in KEYWORDS.items():
+                for keyword, definition in state.keywords.items():
                     if keyword in data["payload"]:
-                        await websocket.send_text(json.dumps({"event": "DEFINE_TERM", "payload": {"term": keyword, "definition": definition}}))
+                        await websocket.send_text(orjson.dumps({"event": "DEFINE_TERM", "payload": {"term": keyword, "definition": definition}}).decode())
                 # TODO : Generate questions every 20s (4 chunks)
                 if counter % 4 == 0:
-                    context = "#Job offer : " + JOB_OFFER + "\n\n#Company values : " + COMPANY_VALUES + "\n\n#Candidate profile : " + CV
-                    QUESTION = await generate_questions.generate_questions_online(model, context, TRANSCRIPT)
-                    await websocket.send_text(json.dumps({"event": "NEW_SUGGESTED_QUESTION", "payload": QUESTION}))
+                    async def send_question_delta(delta):
+                        await websocket.send_text(orjson.dumps({"event": "NEW_SUGGESTED_QUESTION_DELTA", "payload": delta}).decode())
+                    QUESTION = await generate_questions.generate_questions_online(model, state.context, state.transcript_tail(), on_delta=send_question_delta)
+                    await websocket.send_text(orjson.dumps({"event": "NEW_SUGGESTED_QUESTION", "payload": QUESTION}).decode())
                     
             elif data["event"] == "CANDIDATE_INFOS":
-                CANDIDATE_INFOS = data["payload"]
-                linkedin_url = CANDIDATE_INFOS.get("CANDIDATES_LINKEDIN") or CANDIDATE_INFOS.get("linkedin_url", "")
-                job_description = CANDIDATE_INFOS.get("JOB_DESCRIPTION") or CANDIDATE_INFOS.get("job_offer", "")
-                company_values = CANDIDATE_INFOS.get("COMPANY_VALUES", "")
+                state.candidate_infos = data["payload"]
+                linkedin_url = state.candidate_infos.get("CANDIDATES_LINKEDIN") or state.candidate_infos.get("linkedin_url", "")
+                job_description = state.candidate_infos.get("JOB_DESCRIPTION") or state.candidate_infos.get("job_offer", "")
+                company_values = state.candidate_infos.get("COMPANY_VALUES", "")
 
                 if linkedin_url:
                     # Ajouter https:// si manquant
                     if not linkedin_url.startswith("http"):
                         linkedin_url = "https://" + linkedin_url
                     print(f"Extracting LinkedIn profile from: {linkedin_url}")
-                    CV = generate_questions.extract_linkedin(client, linkedin_url)
-                    JOB_OFFER = job_description
-                    COMPANY_VALUES = company_values
+                    state.cv = await generate_questions.extract_linkedin_async(client, linkedin_url)
+                    state.job_offer = job_description
+                    state.company_values = company_values
 
                 # Generate generic questions
-                context = "#Job offer : " + JOB_OFFER + "\n\n#Company values : " + COMPANY_VALUES + "\n\n#Candidate profile : " + CV
-                questions = await generate_questions.generate_questions_beginning(model, context)
-                await websocket.send_text(json.dumps({"event": "STARTING_QUESTIONS", "payload": questions}))
-                print(f"Sent starting question event")
+                state.update_context()
+
+                async def send_starting_question(index, question):
+                    await websocket.send_text(orjson.dumps({"event": "STARTING_QUESTION", "payload": {"index": index, "question": question}}).decode())
+
+                async def send_starting_questions():
+                    questions = await generate_questions.generate_questions_beginning(
+                        model, state.role_context, state.cv, on_question=send_starting_question
+                    )
+                    await websocket.send_text(orjson.dumps({"event": "STARTING_QUESTIONS", "payload": questions}).decode())
+                    print(f"Sent starting question event")
 
                 if linkedin_url:
-                    KEYWORDS = await keyword_search.extract_keywords_and_def(model, CV)
-                    print("KEYWORDS: ", KEYWORDS)
+                    # Starting questions and keyword definitions are independent LLM calls
+                    _, state.keywords = await asyncio.gather(
+                        send_starting_questions(),
+                        keyword_search.extract_keywords_and_def(model, state.cv),
+                    )
+                    print("KEYWORDS: ", state.keywords)
+                else:
+                    await send_starting_questions()
 
             elif data["event"] not in ["GREEN_FLAG", "RED_FLAG", "DEFINE_TERM", "TODO_CREATED", "TICK_TODO"]:
                 print(f"Unknown event type: {data.get('event')}")
-                await websocket.send_text(json.dumps({"event": "error", "payload": "Unknown event type"}))
+                await websocket.send_text(orjson.dumps({"event": "error", "payload": "Unknown event type"}).decode())
 
     except WebSocketDisconnect:
         print("Client disconnected normally")
-    except json.JSONDecodeError as e:
+    except orjson.JSONDecodeError as e:
         print(f"JSON decode error: {e}")
-        await websocket.send_text(json.dumps({"type": "error", "message": f"Invalid JSON: {str(e)}"}))
+        await websocket.send_text(orjson.dumps({"type": "error", "message": f"Invalid JSON: {str(e)}"}).decode())
     except Exception as e:
         print(f"Client disconnected : {e}")
         import traceback
         traceback.print_exc()
         try:
-            await websocket.send_text(json.dumps({"type": "error", "message": str(e)}))
+            await websocket.send_text(orjson.dumps({"type": "error", "message": str(e)}).decode())
         except:
             pass
         await websocket.close()
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    uvicorn.run(
+        app,
+        host="0.0.0.0",
+        port=8000,
+        ws_max_size=WS_MAX_SIZE,
+        ws_ping_interval=20,
+        ws_ping_timeout=20,
+    )
\ No newline at end of file
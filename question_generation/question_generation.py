@@ -1,85 +1,198 @@
-from typing import Any
-import re
-import ast
-import json
-
-from requests.models import Response
+import asyncio
+import hashlib
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from diskcache import Cache
 from langchain_core.messages import SystemMessage
+import orjson
 
-def extract_linkedin(client, url):
-    response = client.search(
-        query=f"You are an expert recruiter. Review the LinkedIn profile at {url} and extract all relevant professional information to create a comprehensive memo tailored for recruiter review. Focus on summarizing work experience, education, key skills, certifications, and notable achievements. Organize the CV into clear sections (Summary, Experience, Education, Skills, Certifications, Achievements) and present the information in a clean, recruiter-friendly format using concise bullet points. Only extract factual informations.",
-        depth="standard",
-        output_type="sourcedAnswer",
-        include_images=False,
-        include_domains=[url],
-        include_inline_citations=False,
-    )
-    return response.answer
+from keyword_search import KEYWORDS_SYSTEM_PROMPT
+from llm_limits import LLM_SEMAPHORE
+from response_cache import ResponseCache, SEMANTIC_CACHE_ENABLED
 
+# System prompts are module constants so every call sends a byte-identical, cacheable prefix
+BEGINNING_SYSTEM_PROMPT = """You are a proficient job interviewer.
+            Suggest FIVE relevant introductory questions to the candidate to guide the interview in specific topics relevant to the job offer.
+            Make use of the job offer, the company values and the candidate\'s resume for maximum relevance.
+            KEEP THE QUESTIONS CONCISE AND TO THE POINT.
+            
+            CRITICAL OUTPUT FORMAT REQUIREMENTS:
+            - Output EXACTLY five questions
+            - Separate each question with the delimiter: " ||| "
+            - Do NOT include numbering (no 1., 2., etc.)
+            - Do NOT include any introductory text, explanations, or concluding remarks
+            - Do NOT use newlines between questions
+            - Your entire response must be ONLY the five questions separated by " ||| "
+            - YOUR OUTPUT MUST BE IN ASCII CHARACTER SET. NO em-dash.
+            Example format:
+            Question one here? ||| Question two here? ||| Question three here? ||| Question four here? ||| Question five here?"""
+
+ONLINE_SYSTEM_PROMPT = """You are a proficient job interviewer. 
+                    Identify the last topic covered in the transcript and suggest ONE relevant question about it to the candidate to clarify his fit for the job. 
+                    Make use of the job offer, the company values and the candidate's resume for maximum relevance. 
+                    You must return ONLY the question, without any other text. KEEP IT REALLY SHORT AND TO THE POINT."""
+
+# A single follow-up question needs far fewer tokens than the shared model's default
+ONLINE_QUESTION_MAX_TOKENS = 128
+
+# Starting questions only depend on the job/values/CV context, so near-identical
+# contexts may share them; follow-up questions are only reused for the exact same input
+_beginning_cache = ResponseCache(semantic=SEMANTIC_CACHE_ENABLED)
+_online_cache = ResponseCache()
+
+# Parsed resumes keyed by a hash of the PDF bytes, so an unchanged file is never re-parsed
+resume_cache = Cache(os.getenv("RESUME_CACHE_DIR", "/tmp/resume_cache"))
+
+# Profile extractions keyed by kind and URL; the same profile is not searched again for 24h
+profile_cache = Cache(os.getenv("PROFILE_CACHE_DIR", "/tmp/profile_cache"))
+PROFILE_CACHE_TTL = 24 * 60 * 60
+
+_PROFILE_PROMPT_TEMPLATE = "You are an expert recruiter. Review the {kind} profile at {url} and extract all relevant professional information to create a comprehensive memo tailored for recruiter review. Focus on summarizing work experience, education, key skills, certifications, and notable achievements. Organize the CV into clear sections (Summary, Experience, Education, Skills, Certifications, Achievements) and present the information in a clean, recruiter-friendly format using concise bullet points. Only extract factual informations."
+
+def extract_profile(client, url, kind="LinkedIn"):
+    key = f"{kind}:{url.strip().rstrip('/').lower()}"
+    answer = profile_cache.get(key)
+    if answer is not None:
+        return answer
 
-def extract_github(client, url):
     response = client.search(
-        query=f"You are an expert recruiter. Review the GitHub profile at {url} and extract all relevant professional information to create a comprehensive memo tailored for recruiter review. Focus on summarizing work experience, education, key skills, certifications, and notable achievements. Organize the CV into clear sections (Summary, Experience, Education, Skills, Certifications, Achievements) and present the information in a clean, recruiter-friendly format using concise bullet points. Only extract factual informations.",
+        query=_PROFILE_PROMPT_TEMPLATE.format(kind=kind, url=url),
         depth="standard",
         output_type="sourcedAnswer",
         include_images=False,
         include_domains=[url],
         include_inline_citations=False,
     )
+    profile_cache.set(key, response.answer, expire=PROFILE_CACHE_TTL)
     return response.answer
 
-def pdf_to_markdown(pdf_path):
-    from pypdf import PdfReader
+extract_linkedin = partial(extract_profile, kind="LinkedIn")
+extract_github = partial(extract_profile, kind="GitHub")
 
-    reader = PdfReader(pdf_path)
-    markdown_content = []
+async def extract_linkedin_async(client, url):
+    return await asyncio.to_thread(extract_linkedin, client, url)
 
-    for page_num, page in enumerate(reader.pages, 1):
-        text = page.extract_text()
-        if text.strip():
-            markdown_content.append(f"{text}\n\n")
+async def extract_github_async(client, url):
+    return await asyncio.to_thread(extract_github, client, url)
 
-    return "".join(markdown_content)
+async def gather_profiles(client, linkedin_url, github_url):
+    """Extract the LinkedIn and GitHub profiles concurrently, returning (linkedin_cv, github_cv)"""
+    return await asyncio.gather(
+        extract_linkedin_async(client, linkedin_url),
+        extract_github_async(client, github_url),
+    )
 
-async def generate_questions_beginning(model, context):
+# PyMuPDF is neither thread-safe nor GIL-releasing, so long PDFs are split across processes
+PDF_PARALLEL_MIN_PAGES = 20
 
-    messages = [
-        {"role": "system", "content": """You are a proficient job interviewer.
-            Suggest FIVE relevant introductory questions to the candidate to guide the interview in specific topics relevant to the job offer.
-            Make use of the job offer, the company values and the candidate\'s resume for maximum relevance.
-            KEEP THE QUESTIONS CONCISE AND TO THE POINT.
-            
-            CRITICAL OUTPUT FORMAT REQUIREMENTS:
-            - Output EXACTLY five questions
-            - Separate each question with the delimiter: " ||| "
-            - Do NOT include numbering (no 1., 2., etc.)
-            - Do NOT include any introductory text, explanations, or concluding remarks
-            - Do NOT use newlines between questions
-            - Your entire response must be ONLY the five questions separated by " ||| "
-            - YOUR OUTPUT MUST BE IN ASCII CHARACTER SET. NO em-dash.
-            Example format:
-            Question one here? ||| Question two here? ||| Question three here? ||| Question four here? ||| Question five here?"""},
-        {"role": "user", "content": context},
-    ]
+def _extract_pages_text(pdf_bytes, start, stop):
+    """Text of pages [start, stop); runs in a worker process with its own document handle"""
+    import fitz  # PyMuPDF
+
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        return [doc[i].get_text("text") for i in range(start, stop)]
 
-    response = model.invoke(messages).content
+def pdf_to_markdown(pdf_path):
+    with open(pdf_path, "rb") as f:
+        pdf_bytes = f.read()
+    key = hashlib.blake2b(pdf_bytes, digest_size=16).hexdigest()
+    markdown = resume_cache.get(key)
+    if markdown is not None:
+        return markdown
+
+    import fitz  # PyMuPDF
+
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        page_count = doc.page_count
+        if page_count < PDF_PARALLEL_MIN_PAGES:
+            texts = [page.get_text("text") for page in doc]
+
+    if page_count >= PDF_PARALLEL_MIN_PAGES:
+        workers = min(os.cpu_count() or 1, page_count)
+        step = -(-page_count // workers)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(_extract_pages_text, pdf_bytes, start, min(start + step, page_count))
+                for start in range(0, page_count, step)
+            ]
+            texts = [text for future in futures for text in future.result()]
+
+    markdown_content = io.StringIO()
+    for text in texts:
+        if text and not text.isspace():
+            markdown_content.write(text)
+            markdown_content.write("\n\n")
+
+    markdown = markdown_content.getvalue()
+    resume_cache.set(key, markdown)
+    return markdown
+
+async def generate_questions_beginning(model, role_context, cv, on_question=None):
+    """
+    Suggest five opening questions; role_context (job offer + company values) is cached across candidates.
+    While streaming, awaits on_question(index, question) as soon as each question is complete.
+    """
+    context = f"{role_context}\n\n#Candidate profile : {cv}"
+    cached, embedding = await _beginning_cache.lookup(context)
+    if cached is not None:
+        # Replay the cached questions so hits produce the same events as a fresh stream
+        if on_question is not None:
+            for index, question in orjson.loads(cached).items():
+                await on_question(int(index), question)
+        return cached
 
-    questions = response.split('|||')
-    questions = {i:question.strip() for i, question in enumerate(questions, start=1)}
+    messages = [
+        SystemMessage(
+            content=[
+                {"type": "text", "text": BEGINNING_SYSTEM_PROMPT, "cache_control": {"type": "ephemeral"}},
+                {"type": "text", "text": role_context, "cache_control": {"type": "ephemeral"}},
+            ]
+        ),
+        {"role": "user", "content": f"#Candidate profile : {cv}"},  # Varies per candidate
+    ]
 
-    return json.dumps(questions)
+    questions = {}
+
+    async def emit(question):
+        questions[len(questions) + 1] = question
+        if on_question is not None:
+            await on_question(len(questions), question)
+
+    pending = ""
+    async with LLM_SEMAPHORE:
+        async for chunk in model.astream(messages):
+            if not chunk.content:
+                continue
+            pending += chunk.content
+            # The prompt asks for exactly five questions, so only the first four end with a delimiter
+            while len(questions) < 4 and '|||' in pending:
+                question, pending = pending.split('|||', 1)
+                await emit(question.strip())
+    # Anything past a fifth delimiter is extra output, not part of the fifth question
+    await emit(pending.split('|||', 1)[0].strip())
+
+    result = orjson.dumps(questions, option=orjson.OPT_NON_STR_KEYS).decode()
+    _beginning_cache.store(context, result, embedding)
+    return result
+
+async def generate_questions_online(model, context, transcript, on_delta=None):
+    """Suggest one follow-up question, awaiting on_delta(text) for each streamed chunk"""
+    cache_key = f"{context}\0{transcript}"
+    cached, _ = await _online_cache.lookup(cache_key)
+    if cached is not None:
+        if on_delta is not None:
+            await on_delta(cached)
+        return cached
 
-async def generate_questions_online(model, context, transcript):
     messages = [
         SystemMessage(
             content=[
                 {
                     "type": "text",
-                    "text": """You are a proficient job interviewer. 
-                    Identify the last topic covered in the transcript and suggest ONE relevant question about it to the candidate to clarify his fit for the job. 
-                    Make use of the job offer, the company values and the candidate's resume for maximum relevance. 
-                    You must return ONLY the question, without any other text. KEEP IT REALLY SHORT AND TO THE POINT.""",
+                    "text": ONLINE_SYSTEM_PROMPT,
                     "cache_control": {"type": "ephemeral"}  # CACHE THIS
                 },
                 {
@@ -95,28 +208,25 @@ async def generate_questions_online(model, context, transcript):
         }
     ]
 
-    response = model.invoke(messages).content
-    
+    chunks = []
+    async with LLM_SEMAPHORE:
+        async for chunk in model.astream(messages, max_tokens=ONLINE_QUESTION_MAX_TOKENS):
+            if chunk.content:
+                chunks.append(chunk.content)
+                if on_delta is not None:
+                    await on_delta(chunk.content)
+
+    response = "".join(chunks)
+    _online_cache.store(cache_key, response)
     return response
 
 async def extract_keywords(model, text):
     messages = [
-        {"role": "system", "content": """You must extract the technical keywords and entities that a non-technical recruiter might not know from the text you are given. 
-        
-        CRITICAL OUTPUT FORMAT REQUIREMENTS:
-            - Separate each keyword with the delimiter: " ||| "
-            - Do NOT include numbering (no 1., 2., etc.)
-            - Do NOT include any introductory text, explanations, or concluding remarks
-            - Do NOT use newlines between keywords
-            - Your entire response must be ONLY the five questions separated by " ||| "
-            - YOUR OUTPUT MUST BE IN ASCII CHARACTER SET. NO em-dash.
-            Example format:
-            Keyword1 ||| Keyword2 ||| Keyword3 ||| Keyword4"""},
+        SystemMessage(content=[{"type": "text", "text": KEYWORDS_SYSTEM_PROMPT, "cache_control": {"type": "ephemeral"}}]),
         {"role": "user", "content": text},
     ]
-    Response = model.invoke(messages).content
+    async with LLM_SEMAPHORE:
+        Response = (await model.ainvoke(messages)).content
 
-    keywords = Response.split('|||')
-    keywords = [keyword.strip() for i, keyword in enumerate(keywords, start=1)]
-    return keywords
+    return [keyword.strip() for keyword in Response.split('|||')]
 
@@ -0,0 +1,75 @@
+import asyncio
+import hashlib
+import os
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+SEMANTIC_CACHE_ENABLED = os.getenv("QUESTION_SEMANTIC_CACHE", "false").lower() in ("1", "true", "yes")
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("QUESTION_SEMANTIC_CACHE_THRESHOLD", "0.95"))
+
+_embedder = None
+
+def embed(text):
+    """Normalized sentence embedding of text; the model is loaded on first use"""
+    global _embedder
+    if _embedder is None:
+        from sentence_transformers import SentenceTransformer
+        _embedder = SentenceTransformer(EMBEDDING_MODEL)
+    return _embedder.encode(text, normalize_embeddings=True)
+
+
+class ResponseCache:
+    """
+    In-memory LRU of LLM responses with a TTL.
+    Lookups match the exact prompt text first, then (when semantic) the most
+    similar stored prompt whose cosine similarity reaches the threshold.
+    """
+
+    def __init__(self, maxsize=1024, ttl=3600, semantic=False, threshold=SEMANTIC_CACHE_THRESHOLD):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.semantic = semantic
+        self.threshold = threshold
+        self._entries = OrderedDict() # key -> (expires_at, embedding, response)
+
+    @staticmethod
+    def _key(text):
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+    def _evict_expired(self, now):
+        for key in [key for key, (expires_at, _, _) in self._entries.items() if expires_at <= now]:
+            del self._entries[key]
+
+    async def lookup(self, text):
+        """Return (cached response or None, embedding to pass to store)"""
+        now = time.monotonic()
+        key = self._key(text)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > now:
+            self._entries.move_to_end(key)
+            return entry[2], entry[1]
+
+        if not self.semantic:
+            return None, None
+
+        embedding = await asyncio.to_thread(embed, text)
+        self._evict_expired(now)
+        candidates = [(key, entry) for key, entry in self._entries.items() if entry[1] is not None]
+        if candidates:
+            scores = np.stack([entry[1] for _, entry in candidates]) @ embedding
+            best = int(np.argmax(scores))
+            if scores[best] >= self.threshold:
+                best_key, best_entry = candidates[best]
+                self._entries.move_to_end(best_key)
+                return best_entry[2], embedding
+        return None, embedding
+
+    def store(self, text, response, embedding=None):
+        key = self._key(text)
+        self._entries[key] = (time.monotonic() + self.ttl, embedding, response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)